@@ -0,0 +1,101 @@
+"""HTTP 엔드포인트 부하 테스트. Flask 테스트 클라이언트(프로세스 내) 또는 --url 로 띄운 gunicorn 을 대상으로 한다."""
+
+import itertools
+import json
+import threading
+import time
+import urllib.request
+
+from common import report, summarize
+
+WARM_TICKERS = ['AAPL', 'MSFT', 'NVDA', '005930.KS', '000660.KS']
+
+
+def _getter(url):
+    if url:
+        def get(path):
+            with urllib.request.urlopen(url.rstrip('/') + path, timeout=30) as r:
+                body = r.read()
+            return r.status, body
+        return lambda: get
+
+    import stockscan as s
+
+    def make():
+        client = s.app.test_client()
+        def get(path):
+            r = client.get(path)
+            return r.status_code, r.get_data()
+        return get
+    return make
+
+
+def load(make_get, paths, concurrency=8, duration=3.0):
+    """duration 초 동안 concurrency 개 스레드가 paths 를 돌아가며 요청한다."""
+    samples, errors = [], [0]
+    lock = threading.Lock()
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        get = make_get()
+        local, bad = [], 0
+        while time.perf_counter() < deadline:
+            path = paths(next(counter))
+            t = time.perf_counter()
+            status, body = get(path)
+            local.append(time.perf_counter() - t)
+            if status != 200 or b'"error"' in body:
+                bad += 1
+        with lock:
+            samples.extend(local)
+            errors[0] += bad
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    wall = time.perf_counter() - start
+    r = summarize(samples)
+    r['ops_per_s'] = round(len(samples) / wall, 2)
+    r['errors'] = errors[0]
+    r['concurrency'] = concurrency
+    return r
+
+
+def run(quick=False, url=None, concurrency=8, duration=None):
+    duration = duration or (1.0 if quick else 3.0)
+    make_get = _getter(url)
+    target = url or 'test-client'
+    results = {}
+
+    def bench(name, paths):
+        key = f'http/{name}/c{concurrency}'
+        results[key] = r = load(make_get, paths, concurrency, duration)
+        report(key, r)
+        if r['errors']:
+            print(f"  ! {r['errors']} 건 오류 응답")
+
+    print(f'# target: {target}')
+    warm = lambda i: WARM_TICKERS[i % len(WARM_TICKERS)]
+    cold = lambda i: f'C{i:05d}'
+    bench('analyze/warm', lambda i: f'/analyze?ticker={warm(i)}')
+    bench('analyze/cold', lambda i: f'/analyze?ticker={cold(i)}')
+    bench('news/warm', lambda i: f'/news?ticker={warm(i)}')
+    bench('report/warm', lambda i: f'/report?ticker={warm(i)}')
+    universe = ','.join(f'S{i:03d}' for i in range(50))
+    bench('scan/50', lambda i: f'/scan?tickers={universe}')
+    book = ','.join(f'P{i:03d}' for i in range(200))
+    bench('portfolio/200', lambda i: f'/portfolio?tickers={book}&matrix=0')
+    if not url:
+        import stockscan as s
+        if not s.screener.universe:
+            s.screener.universe = [f'S{i:04d}' for i in range(2000)]
+        s.screener.refresh()
+    bench('screen/rsi_vol', lambda i: '/screen?where=rsi<30,vol_ratio>1.5&sort=-vol_ratio&limit=50')
+    if not url:
+        import stockscan as s
+        print('# cache: ' + json.dumps(s.history_cache.stats()))
+    return results
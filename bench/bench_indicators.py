@@ -0,0 +1,103 @@
+"""지표 계산·채점·직렬화 마이크로벤치마크 (네트워크 없음)."""
+
+import numpy as np
+import pandas as pd
+
+from common import measure, report
+
+
+def _prices(n, tickers=1, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end='2026-01-02', periods=n, tz='America/New_York')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (n, tickers)), axis=0))
+    volume = rng.lognormal(13, 0.5, (n, tickers)).round()
+    cols = [f'T{i:04d}' for i in range(tickers)]
+    if tickers == 1:
+        return pd.Series(close[:, 0], index=index), pd.Series(volume[:, 0], index=index)
+    return pd.DataFrame(close, index=index, columns=cols), pd.DataFrame(volume, index=index, columns=cols)
+
+
+def run(quick=False):
+    import stockscan as s
+
+    min_time = 0.1 if quick else 0.5
+    results = {}
+
+    def bench(name, fn, **kw):
+        results[name] = r = measure(fn, min_time=min_time, **kw)
+        report(name, r)
+
+    lengths = [60, 1000] if quick else [60, 250, 1000, 5000]
+    for n in lengths:
+        closes, _ = _prices(n)
+        bench(f'calc_rsi/series/{n}', lambda: s.calc_rsi(closes))
+        bench(f'calc_macd/series/{n}', lambda: s.calc_macd(closes))
+        bench(f'calc_bollinger/series/{n}', lambda: s.calc_bollinger(closes))
+
+    for k in ([100] if quick else [10, 100, 500]):
+        closes, volumes = _prices(250, k)
+        bench(f'calc_rsi/wide250/{k}', lambda: s.calc_rsi(closes), ops=k)
+        bench(f'calc_macd/wide250/{k}', lambda: s.calc_macd(closes), ops=k)
+        bench(f'calc_bollinger/wide250/{k}', lambda: s.calc_bollinger(closes), ops=k)
+        tail_c, tail_v = s.tail_aligned(closes, volumes, 60)
+        bench(f'scan_score/wide60/{k}', lambda: s.rule_scores(s.rule_signals(s.indicator_snapshot(tail_c, tail_v)[0])), ops=k)
+
+    for k in ([100] if quick else [100, 500]):
+        closes, volumes = _prices(2500, k)
+        bench(f'indicator_panel/2500x{k}', lambda: s.indicator_panel(closes, volumes), ops=k)
+        panel = s.indicator_panel(closes, volumes)
+        bench(f'backtest/2500x{k}', lambda: s.backtest(panel), ops=k)
+
+    closes, _ = _prices(251, 200)
+    returns = closes.pct_change().iloc[1:].to_numpy()
+    weights = np.full(200, 1 / 200)
+    bench('portfolio_risk/250x200', lambda: s.portfolio_risk(returns, weights, returns.mean(axis=1)))
+
+    rng = np.random.default_rng(0)
+    tickers = [f'T{i:04d}' for i in range(1000)]
+    cols = {k: rng.uniform(0, 100, 1000) for k in s.SCREEN_FIELDS}
+    prev = s.ScreenTable(tickers, {**cols, 'verdict': np.zeros(1000, dtype=int)}, 0)
+    moved = {k: x + rng.normal(0, 0.5, 1000) for k, x in cols.items()}
+    cur = s.ScreenTable(tickers, {**moved, 'verdict': np.zeros(1000, dtype=int)}, 1)
+    engine = s.AlertEngine()
+    for i in range(10000):
+        field = s.SCREEN_FIELDS[i % len(s.SCREEN_FIELDS)]
+        engine.rules[str(i)] = ({'id': str(i), 'name': '', 'ticker': tickers[i % 1000] if i % 10 else '*', 'when': ''},
+                                [(field, '<' if i % 2 else '>', float(rng.uniform(0, 100)))])
+    bench('alerts/evaluate/10k_rules_1k', lambda: engine.evaluate(prev, cur))
+
+    closes, volumes = _prices(60)
+    v, series = s.indicator_snapshot(closes, volumes)
+    v = {key: float(x) for key, x in v.items()}
+    bench('indicator_snapshot/series/60', lambda: s.indicator_snapshot(closes, volumes))
+
+    def score():
+        signals = s.rule_signals(v)
+        buy, sell = s.rule_scores(signals)
+        return s.describe_indicators(v, signals), s.verdict_of(buy, sell)
+    bench('scoring/single', score)
+
+    long_hist = pd.DataFrame(dict(zip(['Close', 'Volume'], _prices(1000))))
+    bench('incremental/build/1000', lambda: s.IncrementalIndicators().update(long_hist), ops=1000)
+    engine = s.IncrementalIndicators().update(long_hist)
+    tick = long_hist.copy()
+    def refresh():
+        tick.iloc[-1, 0] *= 1.0001
+        engine.update(tick)
+    bench('incremental/refresh_last_bar', refresh)
+    bench('incremental/snapshot', lambda: engine.snapshot(60))
+
+    for n in (60, 1000):
+        values = _prices(n)[0].rolling(20).mean()
+        bench(f'safe_list/{n}', lambda: s.safe_list(values))
+
+    long_closes = _prices(5000)[0].to_numpy()
+    bench('lttb/5000→400', lambda: s.lttb_indices(long_closes, 400))
+
+    c120, v120 = _prices(120)
+    ohlcv = pd.DataFrame({'Open': c120, 'High': c120, 'Low': c120, 'Close': c120, 'Volume': v120})
+    payload = s.build_analysis('BENCH', ohlcv, {'shortName': 'Bench'})
+    bench('build_analysis/120', lambda: s.build_analysis('BENCH', ohlcv, {'shortName': 'Bench'}))
+    with s.app.app_context():
+        bench('jsonify/analysis', lambda: s.jsonify(payload).get_data())
+    return results
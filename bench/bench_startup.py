@@ -0,0 +1,52 @@
+"""워커 콜드 스타트 측정. 매번 새 파이썬 프로세스를 띄워 import 부터 첫 응답까지 걸린 시간을 잰다."""
+
+import json
+import os
+import subprocess
+import sys
+
+from common import ROOT, report, summarize
+
+# 자식 프로세스에서 실행: 단계별 누적 시간(초)을 JSON 한 줄로 출력
+CHILD = r'''
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+import stockscan as s
+out = {{'import': time.perf_counter() - t0}}
+client = s.app.test_client()
+for name, path in {paths!r}:
+    if name == 'preload':
+        s.preload()
+    else:
+        assert client.get(path).status_code == 200, path
+    out[name] = time.perf_counter() - t0
+print(json.dumps(out))
+'''
+
+SCENARIOS = {
+    # 지연 로딩: 정적 페이지·헬스 체크는 무거운 모듈 없이 답한다
+    'lazy': [('index', '/'), ('healthz', '/healthz'), ('analyze', '/analyze?ticker=AAPL')],
+    # preload_app 마스터가 하는 일: import + 무거운 모듈 미리 불러오기
+    'preload': [('preload', None), ('analyze', '/analyze?ticker=AAPL')],
+}
+
+
+def cold_start(paths):
+    code = CHILD.format(root=ROOT, paths=paths)
+    # 앞선 실행이 남긴 공유 캐시·봉 저장소를 쓰면 콜드 스타트가 아니다
+    env = dict(os.environ, STOCKSCAN_SHARED_CACHE='0', STOCKSCAN_STORE='0')
+    out = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def run(quick=False):
+    runs = 3 if quick else 7
+    results = {}
+    for scenario, paths in SCENARIOS.items():
+        samples = [cold_start(paths) for _ in range(runs)]
+        for stage in samples[0]:
+            key = f'startup/{scenario}/{stage}'
+            results[key] = r = summarize([sample[stage] for sample in samples])
+            report(key, r)
+    return results
@@ -0,0 +1,101 @@
+"""벤치마크 공통: 오프라인 환경 설정, 반복 측정, 결과 저장/비교."""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'bench', 'results')
+
+
+def offline_env(latency=0.0, data_dir=None):
+    """stockscan 을 import 하기 전에 불러야 한다. Yahoo 대신 합성 데이터 공급자를 쓰게 한다."""
+    os.environ.setdefault('STOCKSCAN_PROVIDER', 'fixture')
+    os.environ.setdefault('STOCKSCAN_FIXTURE_LATENCY', str(latency))
+    if data_dir:
+        os.environ.setdefault('STOCKSCAN_DATA_DIR', data_dir)
+    else:
+        os.environ.setdefault('STOCKSCAN_STORE', '0')
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+
+def summarize(samples, ops=1):
+    """호출별 소요 시간(초) 목록 → 처리량과 p50/p99 (ms)."""
+    samples = sorted(samples)
+    n = len(samples)
+    pct = lambda q: samples[min(int(q * n), n - 1)] * 1000
+    total = sum(samples)
+    return {
+        'n': n,
+        'mean_ms': round(total / n * 1000, 4),
+        'p50_ms': round(pct(0.50), 4),
+        'p99_ms': round(pct(0.99), 4),
+        'ops_per_s': round(n * ops / total, 2) if total else None,
+    }
+
+
+def measure(fn, min_time=0.5, min_runs=5, max_runs=100000, ops=1):
+    """fn 을 min_time 초 이상(최소 min_runs 회) 반복해 호출별 시간을 잰다."""
+    fn()
+    samples = []
+    start = time.perf_counter()
+    while len(samples) < max_runs and (len(samples) < min_runs or time.perf_counter() - start < min_time):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    return summarize(samples, ops)
+
+
+def git_rev():
+    try:
+        rev = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+        dirty = subprocess.call(['git', 'diff', '--quiet', 'HEAD'], cwd=ROOT) != 0
+        return rev + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save(results, out_dir=RESULTS_DIR):
+    """results/<시각>-<커밋>.json 으로 저장하고 직전 결과 파일 경로를 돌려준다."""
+    os.makedirs(out_dir, exist_ok=True)
+    previous = sorted(f for f in os.listdir(out_dir) if f.endswith('.json'))
+    rev = git_rev()
+    doc = {
+        'commit': rev,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    path = os.path.join(out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{rev}.json")
+    with open(path, 'w') as f:
+        json.dump(doc, f, indent=1)
+    return path, (os.path.join(out_dir, previous[-1]) if previous else None)
+
+
+def compare(current, previous_path, threshold=0.10):
+    """같은 이름의 벤치마크끼리 p50 을 비교해 threshold 이상 느려진 항목을 표시한다."""
+    with open(previous_path) as f:
+        prev = json.load(f)
+    base = prev['results']
+    print(f"\n== 비교: {prev['commit']} ({prev['time']}) 대비 ==")
+    regressions = 0
+    for name, r in current.items():
+        if name not in base or not base[name].get('p50_ms'):
+            continue
+        ratio = r['p50_ms'] / base[name]['p50_ms']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag, regressions = '  ◀ 느려짐', regressions + 1
+        elif ratio < 1 - threshold:
+            flag = '  ▲ 빨라짐'
+        print(f'{name:<48} {base[name]["p50_ms"]:>10.3f} → {r["p50_ms"]:>10.3f} ms  x{ratio:.2f}{flag}')
+    return regressions
+
+
+def report(name, r):
+    print(f"{name:<48} p50 {r['p50_ms']:>10.3f} ms  p99 {r['p99_ms']:>10.3f} ms  {r['ops_per_s']:>12,.1f} ops/s")
@@ -0,0 +1,58 @@
+"""STOCKSCAN 벤치마크 실행기.
+
+  python bench/run.py                 # 마이크로 + HTTP(테스트 클라이언트), 결과 저장 후 직전 결과와 비교
+  python bench/run.py --quick         # 짧게
+  python bench/run.py --only http --url http://127.0.0.1:8000   # 이미 띄운 gunicorn 대상
+  python bench/run.py --latency 0.05  # 합성 공급자에 upstream 지연 50ms 주입
+  python bench/run.py --only startup  # 새 프로세스의 import → 첫 응답 시간
+
+결과는 bench/results/<시각>-<커밋>.json 에 쌓인다.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import compare, offline_env, save
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', choices=['micro', 'http', 'startup'])
+    parser.add_argument('--quick', action='store_true')
+    parser.add_argument('--url', help='부하 테스트 대상 서버 (기본: 프로세스 내 Flask 테스트 클라이언트)')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float)
+    parser.add_argument('--latency', type=float, default=0.0, help='합성 공급자 호출당 지연(초)')
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args(argv)
+
+    offline_env(args.latency, data_dir=tempfile.mkdtemp(prefix='stockscan-bench-'))
+    results = {}
+    if args.only in (None, 'micro'):
+        import bench_indicators
+        print('== 지표 / 채점 / 직렬화 ==')
+        results.update(bench_indicators.run(args.quick))
+    if args.only in (None, 'http'):
+        import bench_endpoints
+        print('\n== HTTP ==')
+        results.update(bench_endpoints.run(args.quick, args.url, args.concurrency, args.duration))
+    if args.only in (None, 'startup'):
+        import bench_startup
+        print('\n== 콜드 스타트 ==')
+        results.update(bench_startup.run(args.quick))
+
+    if args.no_save:
+        return 0
+    path, previous = save(results)
+    print(f'\n저장: {os.path.relpath(path)}')
+    if previous:
+        return 1 if compare(results, previous) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
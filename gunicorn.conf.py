@@ -0,0 +1,33 @@
+"""gunicorn 설정.  gunicorn -c gunicorn.conf.py stockscan:app
+
+STOCKSCAN_PRELOAD=1 (기본): 마스터가 stockscan 과 numpy·pandas·yfinance 를 한 번 불러 두고 워커를 fork 한다.
+  워커는 import 없이 바로 뜨고, 불러 둔 모듈 메모리는 copy-on-write 로 함께 쓴다. 코드 변경은 재시작해야 반영된다.
+STOCKSCAN_PRELOAD=0: 워커마다 가볍게 import 하고(무거운 모듈은 지연 로딩) 뜬 직후 백그라운드에서 데워 둔다.
+  /readyz 는 데우기가 끝나면 200 이다.
+스크리너·알림 평가는 공유 캐시(STOCKSCAN_SHARED_CACHE, 기본 켜짐)의 lease 를 잡은 워커 하나만 하고, 알림 규칙은 STOCKSCAN_ALERT_RULES 파일을 함께 쓴다.
+"""
+
+import os
+
+bind = os.environ.get('STOCKSCAN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'          # /stream(SSE) 연결이 워커 하나를 통째로 잡지 않도록 스레드로 받는다
+threads = int(os.environ.get('STOCKSCAN_THREADS', 16))
+timeout = 60
+graceful_timeout = 20
+preload_app = os.environ.get('STOCKSCAN_PRELOAD', '1') != '0'
+
+
+def when_ready(server):
+    # preload_app 이면 이미 마스터에 stockscan 이 올라와 있다. 워커를 띄우기 전에 무거운 모듈까지 불러 둔다
+    if preload_app:
+        import stockscan
+        stockscan.preload()
+
+
+def post_worker_init(worker):
+    import stockscan
+    if not preload_app:
+        stockscan.warm_up()
+    # 모든 워커가 스크리너를 띄우지만 공유 캐시 lease 를 잡은 하나만 계산하고 알림을 보낸다
+    stockscan.screener.start()
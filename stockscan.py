@@ -5,26 +5,167 @@ STOCKSCAN — 실시간 주식 기술적 분석기 (yfinance)
   1. 라이브러리 설치:  pip install yfinance flask pandas numpy
   2. 실행:             python stockscan.py
   3. 브라우저에서:     http://localhost:5000
+
+오프라인 실행 (Yahoo 호출 없이 합성/녹화 데이터 사용):
+  STOCKSCAN_PROVIDER=fixture [STOCKSCAN_FIXTURE_DIR=fixtures] [STOCKSCAN_FIXTURE_LATENCY=0.2] python stockscan.py
+  픽스처 녹화: python stockscan.py record AAPL 005930.KS --dir fixtures
+
+파라미터 탐색 (프로세스 병렬, 결과는 JSON Lines 로 바로바로 출력):
+  python stockscan.py sweep AAPL MSFT NVDA --grid rsi_period=7,14,21 --grid rsi_low=20,25,30 [--random 50] [--workers 8]
+
+운영 (워커 여러 개, 마스터에서 미리 불러 fork):
+  gunicorn -c gunicorn.conf.py stockscan:app      # 헬스 체크: /healthz (살아 있음), /readyz (요청 받을 준비)
 """
 
-from flask import Flask, jsonify, request
-import yfinance as yf
-import pandas as pd
-import numpy as np
+from flask import Flask, Response, g, has_request_context, jsonify, request
+import bisect
+import contextlib
 import datetime
+import functools
+import gzip
+import hashlib
+import importlib
+import itertools
+import json
+import operator
+import os
+import pickle
+import queue
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from multiprocessing import get_context
+from zoneinfo import ZoneInfo
+from flask.json.provider import DefaultJSONProvider
+try:
+    import fcntl
+except ImportError:  # Windows: 단일 프로세스 실행만 가정
+    fcntl = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+class _LazyModule:
+    """처음 속성을 읽을 때 import 하고 이 모듈의 전역 이름을 진짜 모듈로 바꿔 끼운다.
+    웹 프로세스가 numpy·pandas·yfinance 를 불러오기 전에 index()·/healthz 부터 답할 수 있게 한다."""
+    def __init__(self, name, alias):
+        self._name, self._alias = name, alias
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def _load(self):
+        module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return module
+
+np = _LazyModule('numpy', 'np')
+pd = _LazyModule('pandas', 'pd')
+yf = _LazyModule('yfinance', 'yf')
+STARTED = time.time()
+_warming = threading.Lock()
+
+def preload():
+    """무거운 모듈을 지금 불러오고 pandas 가 처음 쓸 때 여는 하위 모듈까지 한 번 돌려 둔다.
+    gunicorn preload_app 이면 마스터에서 불러 워커들이 fork 로 그 메모리를 함께 쓴다. 스레드는 만들지 않는다."""
+    with _warming:
+        for module in (np, pd, yf):
+            if isinstance(module, _LazyModule):
+                module._load()
+        closes = pd.Series(np.linspace(1, 2, 30), index=pd.bdate_range('2026-01-01', periods=30, tz='America/New_York'))
+        closes.rolling(5).mean()
+        closes.ewm(span=5).mean()
+        closes.resample('W-MON').last()
+
+def warm_up():
+    """워커 하나가 뜬 직후 백그라운드에서 preload(). 그동안에도 index()·/healthz 는 답한다."""
+    threading.Thread(target=preload, name='warm-up', daemon=True).start()
+
+def heavy_modules_loaded():
+    return not any(isinstance(m, _LazyModule) for m in (np, pd, yf))
 
 app = Flask(__name__)
 
-HTML = """<!DOCTYPE html>
-<html lang="ko">
-<head>
-<meta charset="UTF-8">
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<title>STOCKSCAN — 실시간 기술적 분석기</title>
-<link href="https://fonts.googleapis.com/css2?family=Space+Mono:wght@400;700&family=Bebas+Neue&family=Noto+Sans+KR:wght@300;400;700&display=swap" rel="stylesheet">
-<script src="https://cdnjs.cloudflare.com/ajax/libs/Chart.js/4.4.0/chart.umd.min.js"></script>
-<style>
-  :root {
+CACHE_SIZE = int(os.environ.get('STOCKSCAN_CACHE_SIZE', 256))
+TTL_OPEN = float(os.environ.get('STOCKSCAN_TTL_OPEN', 60))
+TTL_CLOSED = float(os.environ.get('STOCKSCAN_TTL_CLOSED', 3600))
+SCAN_MAX = int(os.environ.get('STOCKSCAN_SCAN_MAX', 1000))
+IO_WORKERS = int(os.environ.get('STOCKSCAN_IO_WORKERS', 8))
+BATCH_WORKERS = int(os.environ.get('STOCKSCAN_BATCH_WORKERS', 8))    # /news/batch 전용 풀 (단건 요청의 upstream 풀을 잡아먹지 않게)
+UPSTREAM_TIMEOUT = float(os.environ.get('STOCKSCAN_UPSTREAM_TIMEOUT', 10))
+STALE_TTL = float(os.environ.get('STOCKSCAN_STALE_TTL', 86400))        # 만료 뒤에도 옛 값을 줄 수 있는 시간 (0: 끔)
+RETRIES = int(os.environ.get('STOCKSCAN_RETRIES', 2))
+RETRY_BASE = float(os.environ.get('STOCKSCAN_RETRY_BASE', 0.5))
+RETRY_MAX = float(os.environ.get('STOCKSCAN_RETRY_MAX', 4))
+BREAKER_THRESHOLD = int(os.environ.get('STOCKSCAN_BREAKER_THRESHOLD', 10))   # 재시도까지 실패한 호출이 연속 몇 번이면 차단할지
+BREAKER_COOLDOWN = float(os.environ.get('STOCKSCAN_BREAKER_COOLDOWN', 30))
+DATA_DIR = os.environ.get('STOCKSCAN_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+STORE_ENABLED = os.environ.get('STOCKSCAN_STORE', '1') != '0'
+SHARED_CACHE = os.environ.get('STOCKSCAN_SHARED_CACHE', 'sqlite')     # 워커 공유 캐시: 'sqlite' | SQLite 파일 경로 | '0'
+METRICS_ENABLED = os.environ.get('STOCKSCAN_METRICS', '1') != '0'
+SERVER_TIMING = os.environ.get('STOCKSCAN_SERVER_TIMING', '0') != '0'
+STREAM_INTERVAL = float(os.environ.get('STOCKSCAN_STREAM_INTERVAL', 15))
+STREAM_KEEPALIVE = 20
+STREAM_QUEUE_SIZE = 32
+JSON_BACKEND = os.environ.get('STOCKSCAN_JSON', 'orjson')
+COMPRESS_ENABLED = os.environ.get('STOCKSCAN_COMPRESS', '1') != '0'    # 동적 응답 gzip/brotli (앞단 프록시가 압축하면 0)
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_TYPES = ('application/json', 'text/plain', 'text/html')
+CHART_POINTS = int(os.environ.get('STOCKSCAN_CHART_POINTS', 400))
+CHART_POINTS_MAX = 5000
+NEWS_LIMIT_MAX = 50       # /news/batch 종목당 헤드라인 수 상한
+DEFAULT_PERIOD = '3mo'
+WARMUP_BARS = 70          # 차트 첫 봉부터 ma60·MACD 가 채워지도록 앞쪽에 더 받아 둘 봉 수
+# 봉 간격 → 분. 1d 이상은 일봉에서, 분봉은 아래 기본 분봉에서 서버가 합쳐 만든다
+INTERVAL_MINUTES = {'1m': 1, '5m': 5, '15m': 15, '30m': 30, '1h': 60, '1d': 1440, '1wk': 7 * 1440, '1mo': 30 * 1440}
+# upstream 이 주는 분봉과 받을 수 있는 최대 기간 (촘촘한 순)
+INTRADAY_BASES = (('1m', '7d'), ('5m', '60d'), ('1h', '720d'))
+SCREEN_UNIVERSE = os.environ.get('STOCKSCAN_UNIVERSE', '')      # 쉼표 구분 티커 또는 한 줄에 하나인 파일
+SCREEN_INTERVAL = float(os.environ.get('STOCKSCAN_SCREEN_INTERVAL', 300))
+SCREEN_CHUNK = 200
+ALERT_RULES = os.environ.get('STOCKSCAN_ALERT_RULES', os.path.join(DATA_DIR, 'alert_rules.json'))   # 알림 규칙 JSON 파일 (API 로 바꾸면 다시 쓴다, '0': 메모리만)
+ALERT_LOG = os.environ.get('STOCKSCAN_ALERT_LOG', '-')           # 알림 JSON Lines 파일 ('-': stderr)
+ALERT_WEBHOOK = os.environ.get('STOCKSCAN_ALERT_WEBHOOK', '')    # 알림을 POST 할 URL
+ALERT_HISTORY = 500
+
+class OrjsonProvider(DefaultJSONProvider):
+    """jsonify 를 orjson 으로 처리한다. numpy 값과 NaN(→ null)을 그대로 받는다."""
+    def _dumps(self, obj):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        return self._app.response_class(self._dumps(self._prepare_response_obj(args, kwargs)), mimetype=self.mimetype)
+
+if orjson is not None and JSON_BACKEND == 'orjson':
+    app.json = OrjsonProvider(app)
+
+# 시장별 (타임존, 정규장 시작, 정규장 종료)
+MARKETS = {
+    'KR': ('Asia/Seoul', datetime.time(9, 0), datetime.time(15, 30)),
+    'US': ('America/New_York', datetime.time(9, 30), datetime.time(16, 0)),
+}
+KR_INDICES = ('^KS11', '^KQ11', '^KS200')
+BENCHMARKS = {'KR': '^KS11', 'US': '^GSPC'}     # /portfolio 베타 기준 지수 기본값
+
+CSS = """  :root {
     --bg: #080c10; --surface: #0d1117; --border: #1e2a38;
     --accent: #00ff88; --danger: #ff3b5c; --warn: #ffb800;
     --text: #c9d1d9; --muted: #4a5568;
@@ -75,6 +216,8 @@ HTML = """<!DOCTYPE html>
   .market-toggle { display:flex; border:1px solid var(--border); border-radius:2px; overflow:hidden; }
   .market-btn { padding:0.8rem 1.5rem; background:transparent; border:none; cursor:pointer; font-family:'Space Mono',monospace; font-size:0.75rem; color:var(--muted); transition:all 0.2s; }
   .market-btn.active { background:var(--accent); color:var(--bg); font-weight:700; }
+  .range-select { padding:0.8rem 1rem; background:transparent; border:1px solid var(--border); border-radius:2px; color:var(--muted); font-family:'Space Mono',monospace; font-size:0.75rem; cursor:pointer; outline:none; }
+  .range-select option { background:var(--bg); }
   .analyze-btn {
     flex:1; padding:0.9rem; background:var(--accent); color:var(--bg); border:none;
     border-radius:2px; font-family:'Bebas Neue',sans-serif; font-size:1.3rem;
@@ -157,57 +300,9 @@ HTML = """<!DOCTYPE html>
   }
   .footer-info a { color:var(--muted); text-decoration:none; }
   .footer-info a:hover { color:var(--accent); }
-</style>
-</head>
-<body>
-<header>
-  <div class="logo">STOCK<span>SCAN</span></div>
-  <div class="live-badge"><div class="dot"></div>LIVE DATA · Yahoo Finance</div>
-</header>
-<main>
-  <div class="search-section">
-    <div class="search-label">▶ 종목 입력 / TICKER SYMBOL</div>
-    <input class="search-input" id="tickerInput" placeholder="예: IBM, AAPL, 005930 (삼성전자)" autocomplete="off" autocorrect="off" spellcheck="false" />
-    <div class="bottom-row">
-      <div class="market-toggle">
-        <button class="market-btn active" id="btnUS" onclick="setMarket('US')">🇺🇸 US</button>
-        <button class="market-btn" id="btnKR" onclick="setMarket('KR')">🇰🇷 KR</button>
-      </div>
-      <button class="analyze-btn" id="analyzeBtn" onclick="analyze()">SCAN</button>
-    </div>
-    <div class="quick-picks">
-      <span class="qpick-label">빠른 선택:</span>
-      <button class="quick-btn" onclick="quick('IBM','US')">IBM</button>
-      <button class="quick-btn" onclick="quick('AAPL','US')">AAPL</button>
-      <button class="quick-btn" onclick="quick('NVDA','US')">NVDA</button>
-      <button class="quick-btn" onclick="quick('TSLA','US')">TSLA</button>
-      <button class="quick-btn" onclick="quick('META','US')">META</button>
-      <button class="quick-btn" onclick="quick('005930','KR')">삼성전자</button>
-      <button class="quick-btn" onclick="quick('000660','KR')">SK하이닉스</button>
-      <button class="quick-btn" onclick="quick('035420','KR')">NAVER</button>
-      <button class="quick-btn" onclick="quick('035720','KR')">카카오</button>
-    </div>
-  </div>
-
-  <div class="loading" id="loading">
-    <div class="loading-text">FETCHING REAL-TIME DATA...</div>
-    <div class="loading-bar"><div class="loading-fill"></div></div>
-    <div class="loading-text" style="font-size:0.55rem;margin-top:0.5rem;color:var(--muted)">RSI · MACD · 볼린저밴드 · 이동평균 계산중</div>
-  </div>
-
-  <div id="results"></div>
-
-  <div class="disclaimer">
-    ⚠ 본 서비스는 기술적 분석 기반의 참고용 정보를 제공하며, 투자 권유가 아닙니다. 실제 투자 결정은 본인의 판단과 책임 하에 이루어져야 합니다.
-  </div>
-
-  <div class="footer-info">
-    MADE BY 김태훈 · <a href="mailto:xognsl3188@gmail.com">xognsl3188@gmail.com</a>
-  </div>
-</main>
+"""
 
-<script>
-let currentMarket = 'US';
+JS = """let currentMarket = 'US';
 let priceChart = null;
 
 function setMarket(m) {
@@ -222,7 +317,37 @@ function quick(t, m) {
   analyze();
 }
 
-async function analyze() {
+let source = null;
+let current = null;
+
+function showError(msg) {
+  document.getElementById('loading').style.display = 'none';
+  document.getElementById('results').innerHTML = `<div class="error-box">❌ ${msg}</div>`;
+  document.getElementById('results').style.display = 'block';
+}
+
+function show(data) {
+  document.getElementById('loading').style.display = 'none';
+  document.getElementById('analyzeBtn').disabled = false;
+  if(data.error) {
+    showError(`${data.error}<br><br>한국 주식: 종목코드.KS (예: 005930.KS)<br>미국 주식: 심볼 그대로 (예: AAPL)`);
+  } else {
+    renderResults(data);
+  }
+}
+
+function applyPatch(d, p) {
+  const {series, removed, ...fields} = p;
+  (removed || []).forEach(k => delete d[k]);
+  Object.assign(d, fields);
+  if(series) {
+    for(const [k, vals] of Object.entries(series.values)) {
+      d[k] = (d[k] || []).slice(series.shift).slice(0, series.start).concat(vals);
+    }
+  }
+}
+
+function analyze() {
   let ticker = document.getElementById('tickerInput').value.trim().toUpperCase();
   if(!ticker) { alert('종목명을 입력해주세요!'); return; }
   if(currentMarket === 'KR' && !ticker.includes('.')) ticker += '.KS';
@@ -231,22 +356,22 @@ async function analyze() {
   document.getElementById('loading').style.display = 'block';
   document.getElementById('analyzeBtn').disabled = true;
 
-  try {
-    const res = await fetch('/analyze?ticker=' + encodeURIComponent(ticker));
-    const data = await res.json();
-    document.getElementById('loading').style.display = 'none';
-    if(data.error) {
-      document.getElementById('results').innerHTML = `<div class="error-box">❌ ${data.error}<br><br>한국 주식: 종목코드.KS (예: 005930.KS)<br>미국 주식: 심볼 그대로 (예: AAPL)</div>`;
-      document.getElementById('results').style.display = 'block';
-    } else {
-      renderResults(data);
-    }
-  } catch(e) {
-    document.getElementById('loading').style.display = 'none';
-    document.getElementById('results').innerHTML = `<div class="error-box">❌ 서버 연결 오류: ${e.message}</div>`;
-    document.getElementById('results').style.display = 'block';
-  }
-  document.getElementById('analyzeBtn').disabled = false;
+  if(source) source.close();
+  current = null;
+  const [period, interval] = document.getElementById('rangeSelect').value.split('|');
+  const es = source = new EventSource('/stream?ticker=' + encodeURIComponent(ticker) + '&period=' + period + '&interval=' + interval);
+  es.addEventListener('snapshot', e => { current = JSON.parse(e.data); show(current); });
+  es.addEventListener('patch', e => {
+    if(!current) return;
+    applyPatch(current, JSON.parse(e.data));
+    show(current);
+  });
+  es.onerror = () => {
+    if(current) return;  // 연결이 끊겨도 브라우저가 자동으로 재연결하고, 서버가 snapshot 을 다시 보낸다
+    es.close();
+    document.getElementById('analyzeBtn').disabled = false;
+    showError('서버 연결 오류');
+  };
 }
 
 function renderResults(d) {
@@ -296,7 +421,7 @@ function renderResults(d) {
     </div>
     <div class="indicators-grid">${indsHTML}</div>
     <div class="chart-section">
-      <div class="chart-title">▶ 60일 실제 가격 차트 + 이동평균선</div>
+      <div class="chart-title">▶ ${d.period} 실제 가격 차트 (${d.interval} 봉) + 이동평균선</div>
       <canvas id="priceChart" style="max-height:300px"></canvas>
     </div>
     <div class="summary-box">
@@ -307,21 +432,20 @@ function renderResults(d) {
   document.getElementById('results').style.display = 'block';
   setTimeout(() => drawChart(d), 100);
 
-  fetch('/news?ticker=' + encodeURIComponent(d.ticker))
-    .then(r => r.json())
-    .then(nd => {
-      if(nd.news && nd.news.length > 0) {
-        const html = nd.news.map(n => `<div class="news-item">
-          <span class="news-badge badge-${n.sentiment}">${n.sentiment}</span>
-          <div class="news-content">
-            <a href="${n.link}" target="_blank" class="news-headline">${n.title}</a>
-            <div class="news-meta">${n.publisher} · ${n.date}</div>
-          </div>
-        </div>`).join('');
-        document.getElementById('results').insertAdjacentHTML('beforeend',
-          `<div class="news-section"><div class="news-title">▶ 최근 뉴스 (호재 / 악재)</div>${html}</div>`);
-      }
-    }).catch(()=>{});
+  renderNews(d.news || []);
+}
+
+function renderNews(news) {
+  if(!news.length) return;
+  const html = news.map(n => `<div class="news-item">
+    <span class="news-badge badge-${n.sentiment}">${n.sentiment}</span>
+    <div class="news-content">
+      <a href="${n.link}" target="_blank" class="news-headline">${n.title}</a>
+      <div class="news-meta">${n.publisher} · ${n.date}</div>
+    </div>
+  </div>`).join('');
+  document.getElementById('results').insertAdjacentHTML('beforeend',
+    `<div class="news-section"><div class="news-title">▶ 최근 뉴스 (호재 / 악재)</div>${html}</div>`);
 }
 
 function drawChart(d) {
@@ -353,11 +477,115 @@ function drawChart(d) {
 }
 
 document.getElementById('tickerInput').addEventListener('keypress', e => { if(e.key==='Enter') analyze(); });
-</script>
+"""
+
+HTML = """<!DOCTYPE html>
+<html lang="ko">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>STOCKSCAN — 실시간 기술적 분석기</title>
+<link href="https://fonts.googleapis.com/css2?family=Space+Mono:wght@400;700&family=Bebas+Neue&family=Noto+Sans+KR:wght@300;400;700&display=swap" rel="stylesheet">
+<script src="https://cdnjs.cloudflare.com/ajax/libs/Chart.js/4.4.0/chart.umd.min.js"></script>
+<link rel="stylesheet" href="{css}">
+</head>
+<body>
+<header>
+  <div class="logo">STOCK<span>SCAN</span></div>
+  <div class="live-badge"><div class="dot"></div>LIVE DATA · Yahoo Finance</div>
+</header>
+<main>
+  <div class="search-section">
+    <div class="search-label">▶ 종목 입력 / TICKER SYMBOL</div>
+    <input class="search-input" id="tickerInput" placeholder="예: IBM, AAPL, 005930 (삼성전자)" autocomplete="off" autocorrect="off" spellcheck="false" />
+    <div class="bottom-row">
+      <div class="market-toggle">
+        <button class="market-btn active" id="btnUS" onclick="setMarket('US')">🇺🇸 US</button>
+        <button class="market-btn" id="btnKR" onclick="setMarket('KR')">🇰🇷 KR</button>
+      </div>
+      <select class="range-select" id="rangeSelect" onchange="if(source) analyze()">
+        <option value="1d|1m">1일 · 1분</option>
+        <option value="5d|5m">5일 · 5분</option>
+        <option value="1mo|1h">1개월 · 1시간</option>
+        <option value="3mo|1d" selected>3개월 · 일봉</option>
+        <option value="1y|1d">1년 · 일봉</option>
+        <option value="5y|1wk">5년 · 주봉</option>
+        <option value="10y|1mo">10년 · 월봉</option>
+      </select>
+      <button class="analyze-btn" id="analyzeBtn" onclick="analyze()">SCAN</button>
+    </div>
+    <div class="quick-picks">
+      <span class="qpick-label">빠른 선택:</span>
+      <button class="quick-btn" onclick="quick('IBM','US')">IBM</button>
+      <button class="quick-btn" onclick="quick('AAPL','US')">AAPL</button>
+      <button class="quick-btn" onclick="quick('NVDA','US')">NVDA</button>
+      <button class="quick-btn" onclick="quick('TSLA','US')">TSLA</button>
+      <button class="quick-btn" onclick="quick('META','US')">META</button>
+      <button class="quick-btn" onclick="quick('005930','KR')">삼성전자</button>
+      <button class="quick-btn" onclick="quick('000660','KR')">SK하이닉스</button>
+      <button class="quick-btn" onclick="quick('035420','KR')">NAVER</button>
+      <button class="quick-btn" onclick="quick('035720','KR')">카카오</button>
+    </div>
+  </div>
+
+  <div class="loading" id="loading">
+    <div class="loading-text">FETCHING REAL-TIME DATA...</div>
+    <div class="loading-bar"><div class="loading-fill"></div></div>
+    <div class="loading-text" style="font-size:0.55rem;margin-top:0.5rem;color:var(--muted)">RSI · MACD · 볼린저밴드 · 이동평균 계산중</div>
+  </div>
+
+  <div id="results"></div>
+
+  <div class="disclaimer">
+    ⚠ 본 서비스는 기술적 분석 기반의 참고용 정보를 제공하며, 투자 권유가 아닙니다. 실제 투자 결정은 본인의 판단과 책임 하에 이루어져야 합니다.
+  </div>
+
+  <div class="footer-info">
+    MADE BY 김태훈 · <a href="mailto:xognsl3188@gmail.com">xognsl3188@gmail.com</a>
+  </div>
+</main>
+
+<script src="{js}"></script>
 </body>
 </html>
 """
 
+def negotiate_encoding(available=('br', 'gzip')):
+    """Accept-Encoding 에서 고른 압축 방식. 받을 수 있는 것이 없으면 None."""
+    if brotli is None:
+        available = [e for e in available if e != 'br']
+    return request.accept_encodings.best_match(available) if available else None
+
+class StaticAsset:
+    """메모리에 올려 둔 UI 파일 하나. 내용 해시가 곧 버전(ETag, URL)이고 gzip·brotli 본을 미리 최고 압축률로 만들어 둔다."""
+    def __init__(self, name, text, mimetype):
+        self.body = text.encode()
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(self.body).hexdigest()[:16]
+        stem, ext = os.path.splitext(name)
+        self.url = f'/static/{stem}.{self.etag}{ext}'
+        self.encoded = {'gzip': gzip.compress(self.body, 9, mtime=0)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(self.body, quality=11)
+
+    def response(self, cache_control):
+        if request.if_none_match.contains_weak(self.etag):
+            response = Response(status=304)
+        else:
+            encoding = negotiate_encoding(tuple(self.encoded))
+            response = Response(self.encoded.get(encoding, self.body), mimetype=self.mimetype)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(self.etag, weak=True)
+        response.headers['Cache-Control'] = cache_control
+        response.vary.add('Accept-Encoding')
+        return response
+
+STATIC_ASSETS = {name: StaticAsset(name, text, mimetype)
+                 for name, text, mimetype in (('app.css', CSS, 'text/css'), ('app.js', JS, 'text/javascript'))}
+INDEX = StaticAsset('index.html', HTML.replace('{css}', STATIC_ASSETS['app.css'].url).replace('{js}', STATIC_ASSETS['app.js'].url), 'text/html')
+VERSIONED_ASSETS = {asset.url.rpartition('/')[2]: asset for asset in STATIC_ASSETS.values()}
+
 def calc_rsi(prices, period=14):
     delta = prices.diff()
     gain = delta.clip(lower=0).rolling(period).mean()
@@ -377,9 +605,2252 @@ def calc_bollinger(prices, period=20, std=2):
     sd = prices.rolling(period).std()
     return ma + std*sd, ma, ma - std*sd
 
+RULE_NAMES = ['RSI', '이동평균', '볼린저밴드', 'MACD', '거래량', '지지/저항']
+RULE_WEIGHTS = [2, 2, 1, 1, 1, 1]
+SIGNAL_LABELS = {1: '매수', 0: '중립', -1: '매도'}
+VERDICT_LABELS = ('매도', '관망', '매수')
+# calc_rsi / calc_macd / calc_bollinger 파라미터 (indicator_panel 인자 이름)
+INDICATOR_PARAMS = {'rsi_period': 14, 'fast': 12, 'slow': 26, 'signal': 9, 'bb_period': 20, 'bb_std': 2}
+# 규칙 임계값. margin: 매수/매도 점수 차가 이보다 커야 관망이 아니다
+RULE_THRESHOLDS = {'rsi_low': 30, 'rsi_high': 70, 'bb_low': 15, 'bb_high': 85, 'vol_spike': 1.5, 'sr_dist': 3, 'margin': 1}
+
+def indicator_snapshot(closes, volumes):
+    """최근 봉 기준 지표값. closes가 Series면 스칼라, 열=티커인 DataFrame이면 티커별 배열."""
+    last = lambda s, i=-1: np.asarray(s.iloc[i], dtype=float)
+    rsi = calc_rsi(closes)
+    macd_line, _, macd_hist = calc_macd(closes)
+    bb_upper, _, bb_lower = calc_bollinger(closes)
+    ma5, ma20, ma60 = (closes.rolling(n).mean() for n in (5, 20, 60))
+    current, prev = last(closes), last(closes, -2)
+    bb_u, bb_l = last(bb_upper), last(bb_lower)
+    support = np.asarray(closes.tail(20).min(), dtype=float)
+    resistance = np.asarray(closes.tail(20).max(), dtype=float)
+    avg_vol = np.asarray(volumes.mean(), dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        v = {
+            'price': current,
+            'price_change': (current - prev) / prev * 100,
+            'rsi': last(rsi),
+            'macd': last(macd_line),
+            'macd_hist': last(macd_hist),
+            'bb_pos': np.where(bb_u - bb_l > 0, (current - bb_l) / (bb_u - bb_l) * 100, 50.0),
+            'ma5': last(ma5),
+            'ma20': last(ma20),
+            'ma60': np.where(np.isnan(last(ma60)), last(ma20), last(ma60)),
+            'vol_ratio': np.where(avg_vol > 0, last(volumes) / avg_vol, 1.0),
+            'dist_sup': (current - support) / support * 100,
+            'dist_res': (resistance - current) / resistance * 100,
+        }
+    return v, {'ma5': ma5, 'ma20': ma20, 'bb_upper': bb_upper, 'bb_lower': bb_lower}
+
+def indicator_panel(closes, volumes, vol_period=60, rsi_period=14, fast=12, slow=26, signal=9, bb_period=20, bb_std=2):
+    """indicator_snapshot 과 같은 지표를 마지막 봉뿐 아니라 모든 봉에 대해 (봉, 티커) 배열로 계산한다.
+    지지/저항은 최근 20봉, 거래량 평균은 최근 vol_period 봉 기준."""
+    a = lambda f: f.to_numpy(dtype=float)
+    macd_line, _, macd_hist = calc_macd(closes, fast, slow, signal)
+    bb_upper, _, bb_lower = calc_bollinger(closes, bb_period, bb_std)
+    ma20, ma60 = a(closes.rolling(20).mean()), a(closes.rolling(60).mean())
+    c = a(closes)
+    prev = np.vstack([np.full((1, c.shape[1]), np.nan), c[:-1]])
+    support, resistance = a(closes.rolling(20, min_periods=1).min()), a(closes.rolling(20, min_periods=1).max())
+    avg_vol = a(volumes.rolling(vol_period, min_periods=1).mean())
+    band = a(bb_upper) - a(bb_lower)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'price': c,
+            'price_change': (c - prev) / prev * 100,
+            'rsi': a(calc_rsi(closes, rsi_period)),
+            'macd': a(macd_line),
+            'macd_hist': a(macd_hist),
+            'bb_pos': np.where(band > 0, (c - a(bb_lower)) / band * 100, 50.0),
+            'ma5': a(closes.rolling(5).mean()),
+            'ma20': ma20,
+            'ma60': np.where(np.isnan(ma60), ma20, ma60),
+            'vol_ratio': np.where(avg_vol > 0, a(volumes) / avg_vol, 1.0),
+            'dist_sup': (c - support) / support * 100,
+            'dist_res': (resistance - c) / resistance * 100,
+        }
+
+def _rule(buy, sell):
+    """매수 조건 +1 / 매도 조건 -1 / 그 외 0. 둘 다 참이면 매수가 우선한다."""
+    buy, sell = np.asarray(buy), np.asarray(sell)
+    return buy.astype(np.int8) - (sell & ~buy)
+
+def rule_signals(v, th=RULE_THRESHOLDS):
+    """규칙별 신호 (+1 매수 / 0 중립 / -1 매도). 입력 배열과 같은 모양 앞에 규칙 축이 붙는다.
+    th 의 값에 배열을 주면 지표 배열과 broadcast 되어 여러 임계값 조합을 한 번에 계산한다."""
+    with np.errstate(invalid='ignore'):
+        spike = np.asarray(v['vol_ratio'] > th['vol_spike'])
+        up = np.asarray(v['price_change'] > 0)
+        return np.stack(np.broadcast_arrays(
+            _rule(v['rsi'] < th['rsi_low'], v['rsi'] > th['rsi_high']),
+            _rule((v['ma5'] > v['ma20']) & (v['ma20'] > v['ma60']), (v['ma5'] < v['ma20']) & (v['ma20'] < v['ma60'])),
+            _rule(v['bb_pos'] < th['bb_low'], v['bb_pos'] > th['bb_high']),
+            _rule((v['macd_hist'] > 0) & (v['macd'] > 0), (v['macd_hist'] < 0) & (v['macd'] < 0)),
+            _rule(spike & up, spike & ~up),
+            _rule(v['dist_sup'] < th['sr_dist'], v['dist_res'] < th['sr_dist']),
+        ))
+
+def rule_scores(signals):
+    w = np.array(RULE_WEIGHTS, dtype=np.int16).reshape((-1,) + (1,) * (signals.ndim - 1))
+    return (w * (signals > 0)).sum(axis=0), (w * (signals < 0)).sum(axis=0)
+
+def verdict_code(buy, sell, margin=1):
+    """+1 매수 / 0 관망 / -1 매도."""
+    return np.where(buy > sell + margin, 1, np.where(sell > buy + margin, -1, 0))
+
+def verdict_of(buy, sell, margin=1):
+    return verdict_label(verdict_code(buy, sell, margin))
+
+def verdict_label(code):
+    """verdict_code 값(스칼라·배열) → 판정 문자열."""
+    return np.asarray(VERDICT_LABELS)[np.asarray(code) + 1]
+
+def confidence_of(buy, sell):
+    return np.maximum(buy, sell) / (buy + sell + 2) * 100
+
+def describe_indicators(v, signals):
+    rsi, bb_pos, vol_ratio, dist_sup, dist_res = v['rsi'], v['bb_pos'], v['vol_ratio'], v['dist_sup'], v['dist_res']
+    # 규칙별 (매도, 중립, 매수) 설명
+    details = [
+        (f'{rsi:.1f} — 과매수', f'{rsi:.1f} — 중립', f'{rsi:.1f} — 과매도'),
+        ('데드크로스 ▼', '혼재 신호', '골든크로스 ▲'),
+        (f'상단 근접 ({bb_pos:.0f}%)', f'중간 ({bb_pos:.0f}%)', f'하단 근접 ({bb_pos:.0f}%)'),
+        ('히스토그램 음전환', '전환점 관찰 중', '히스토그램 양전환'),
+        (f'급증+하락 ({vol_ratio:.1f}x)', f'평균 수준 ({vol_ratio:.1f}x)', f'급증+상승 ({vol_ratio:.1f}x)'),
+        (f'저항선 근접 (-{dist_res:.1f}%)', f'지지 +{dist_sup:.1f}% / 저항 -{dist_res:.1f}%', f'지지선 근접 (+{dist_sup:.1f}%)'),
+    ]
+    return [{'name': name, 'verdict': SIGNAL_LABELS[sig], 'detail': d[sig + 1]}
+            for name, sig, d in zip(RULE_NAMES, np.asarray(signals).tolist(), details)]
+
+def hold_positions(verdict, short=False):
+    """판정대로 사고팔 때의 봉별 포지션. 매수 판정 → 1, 매도 판정 → 0 (short 면 -1), 관망은 직전 포지션을 유지한다."""
+    target = np.where(verdict > 0, 1.0, np.where(verdict < 0, -1.0 if short else 0.0, np.nan))
+    n = target.shape[-2]
+    last = np.maximum.accumulate(np.where(np.isnan(target), 0, np.arange(1, n + 1).reshape(-1, 1)), axis=-2)
+    padded = np.concatenate([np.zeros_like(target[..., :1, :]), target], axis=-2)
+    return np.take_along_axis(padded, last, axis=-2)
+
+def backtest_stats(closes, verdict, horizon=5, cost=0.0, short=False, periods_per_year=252):
+    """closes (봉, 티커) 와 같은 모양(앞에 조합 축이 더 붙어도 된다)의 판정 코드로 티커별 성과를 낸다.
+    판정은 그 봉 종가에 체결하고 다음 봉부터 수익을 센다. cost 는 포지션 1 단위 변경당 비용 비율.
+    적중률은 판정이 새로 나온 봉(신호)마다 horizon 봉 뒤 수익의 부호가 판정 방향과 같은 비율."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        nxt = np.full_like(closes, np.nan)
+        nxt[:-1] = closes[1:] / closes[:-1] - 1
+        fwd = np.full_like(closes, np.nan)
+        if horizon < len(closes):
+            fwd[:-horizon] = closes[horizon:] / closes[:-horizon] - 1
+        pos = hold_positions(verdict, short)
+        turnover = np.abs(np.diff(pos, axis=-2, prepend=0))
+        strat = np.nan_to_num(pos * nxt) - cost * turnover
+        equity = np.cumprod(1 + strat, axis=-2)
+        events = (verdict != 0) & (np.diff(verdict, axis=-2, prepend=0) != 0) & ~np.isnan(fwd)
+        signals = events.sum(axis=-2)
+        mean, std = strat.mean(axis=-2), strat.std(axis=-2)
+        return {
+            'signals': signals,
+            'hit_rate': (events & (np.sign(fwd) == verdict)).sum(axis=-2) / signals,
+            'avg_return': np.where(events, fwd * verdict, 0).sum(axis=-2) / signals,
+            'total_return': equity[..., -1, :] - 1,
+            'benchmark_return': np.nanprod(1 + nxt, axis=-2) - 1,
+            'max_drawdown': (equity / np.maximum.accumulate(equity, axis=-2) - 1).min(axis=-2),
+            'sharpe': np.where(std > 0, mean / std * np.sqrt(periods_per_year), np.nan),
+            'trades': ((turnover > 0) & (pos != 0)).sum(axis=-2),
+            'exposure': (pos != 0).mean(axis=-2),
+        }
+
+def backtest(v, thresholds=None, horizon=5, cost=0.0, short=False, warmup=60):
+    """매수/매도 점수 규칙을 indicator_panel 결과 v 의 모든 봉에 적용한 성과.
+    처음 warmup 봉은 지표가 덜 채워져 판정하지 않는다. thresholds 는 RULE_THRESHOLDS 중 바꿀 값이고,
+    값에 (k, 1, 1) 모양 배열을 주면 k 개 조합이 결과 배열의 앞 축으로 붙어 한 번에 계산된다."""
+    th = {**RULE_THRESHOLDS, **(thresholds or {})}
+    buy, sell = rule_scores(rule_signals(v, th))
+    verdict = verdict_code(buy, sell, th['margin'])[..., warmup:, :]
+    return {'score': (buy - sell)[..., warmup:, :], 'verdict': verdict,
+            **backtest_stats(v['price'][warmup:], verdict, horizon, cost, short)}
+
+SWEEP_OBJECTIVES = ('sharpe', 'excess_return', 'total_return', 'hit_rate')
+
+def sweep_combos(space, n_random=0, seed=0):
+    """space: {파라미터: 후보 목록} 의 조합 목록. n_random 이 있으면 격자 전체 대신 그 수만큼 중복 없이 무작위로 고른다.
+    MACD fast >= slow 인 조합은 뺀다."""
+    keys = list(space)
+    sizes = [len(space[k]) for k in keys]
+    total = int(np.prod(sizes))
+    picks = np.random.default_rng(seed).choice(total, n_random, replace=False) if 0 < n_random < total else range(total)
+    combos = []
+    for flat in picks:
+        combo = {k: space[k][i] for k, i in zip(keys, np.unravel_index(flat, sizes))}
+        p = {**INDICATOR_PARAMS, **combo}
+        if p['fast'] < p['slow']:
+            combos.append(combo)
+    return combos
+
+def _nanmean(a):
+    a = np.asarray(a, dtype=float)
+    a = a[~np.isnan(a)]
+    return round(float(a.mean()), 6) if len(a) else None
+
+def sweep_summary(st):
+    """backtest 결과의 종목 평균 성과 (조합 하나를 한 줄로)."""
+    signals = int(st['signals'].sum())
+    return {
+        'sharpe': _nanmean(st['sharpe']),
+        'excess_return': _nanmean(st['total_return'] - st['benchmark_return']),
+        'total_return': _nanmean(st['total_return']),
+        'hit_rate': round(float(np.nansum(st['hit_rate'] * st['signals']) / signals), 6) if signals else None,
+        'max_drawdown': _nanmean(st['max_drawdown']),
+        'signals': signals,
+        'trades': int(st['trades'].sum()),
+    }
+
+_sweep_data = None
+
+def _sweep_attach(path, shape):
+    """워커 initializer: 부모가 써 둔 종가·거래량 파일을 memmap 으로 연다. 페이지 캐시를 워커들이 함께 쓴다."""
+    global _sweep_data
+    data = np.memmap(path, dtype=np.float64, mode='r', shape=(2,) + tuple(shape))
+    _sweep_data = (pd.DataFrame(data[0], copy=False), pd.DataFrame(data[1], copy=False))
+
+def _sweep_task(ind, thresholds, horizon, cost, short):
+    closes, volumes = _sweep_data
+    v = indicator_panel(closes, volumes, **ind)
+    return [{**ind, **th, **sweep_summary(backtest(v, th, horizon, cost, short))} for th in thresholds]
+
+def sweep(closes, volumes, combos, workers=None, horizon=5, cost=0.0, short=False, batch=16):
+    """combos (sweep_combos 결과) 마다 backtest 를 돌려 종목 평균 성과를 끝나는 순서대로 yield 한다.
+    지표 파라미터가 같은 조합은 batch 개씩 한 작업으로 묶어 지표 패널을 한 번만 계산한다.
+    시세는 임시 파일에 한 번 써서 워커들이 memmap 으로 열고, 작업에는 파라미터만 보낸다. workers=0 이면 이 프로세스에서 돈다."""
+    unknown = {k for c in combos for k in c} - set(INDICATOR_PARAMS) - set(RULE_THRESHOLDS)
+    if unknown:
+        raise ValueError(f'알 수 없는 파라미터: {", ".join(sorted(unknown))}')
+    groups = {}
+    for combo in combos:
+        ind = tuple((k, combo[k]) for k in INDICATOR_PARAMS if k in combo)
+        groups.setdefault(ind, []).append({k: x for k, x in combo.items() if k in RULE_THRESHOLDS})
+    tasks = [(dict(ind), ths[i:i + batch]) for ind, ths in groups.items() for i in range(0, len(ths), batch)]
+    fd, path = tempfile.mkstemp(suffix='.sweep')
+    os.close(fd)
+    pool = None
+    try:
+        data = np.memmap(path, dtype=np.float64, mode='w+', shape=(2,) + closes.shape)
+        data[0], data[1] = closes.to_numpy(dtype=float), volumes.to_numpy(dtype=float)
+        data.flush()
+        del data
+        if workers == 0:
+            _sweep_attach(path, closes.shape)
+            for ind, ths in tasks:
+                yield from _sweep_task(ind, ths, horizon, cost, short)
+            return
+        # fork 는 부모의 스레드(업스트림 풀 등) 상태를 물려받으므로 spawn 으로 띄운다
+        pool = ProcessPoolExecutor(workers, mp_context=get_context('spawn'), initializer=_sweep_attach, initargs=(path, closes.shape))
+        futures = [pool.submit(_sweep_task, ind, ths, horizon, cost, short) for ind, ths in tasks]
+        for future in as_completed(futures):
+            yield from future.result()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        os.remove(path)
+
+def session_closes(closes):
+    """열=티커 종가를 거래소 현지 날짜 하나당 한 행으로 맞춘다. 시장마다 일봉 시각이 달라 UTC 로 합친 표에서는
+    같은 날의 한국·미국 봉이 다른 행에 놓이므로, 시장별로 현지 날짜를 구해 다시 합친다."""
+    values = closes.to_numpy(dtype=float)
+    if closes.index.tz is None:
+        return pd.DataFrame(values, index=closes.index.normalize(), columns=closes.columns)
+    markets = np.array([market_of(t) for t in closes.columns])
+    blocks = []
+    for market in dict.fromkeys(markets):
+        cols = np.flatnonzero(markets == market)
+        block = values[:, cols]
+        rows = ~np.isnan(block).all(axis=1)
+        dates = closes.index[rows].tz_convert(MARKETS[market][0]).tz_localize(None).normalize()
+        frame = pd.DataFrame(block[rows], index=dates, columns=closes.columns[cols])
+        blocks.append(frame[~dates.duplicated(keep='last')])
+    return blocks[0] if len(blocks) == 1 else pd.concat(blocks, axis=1).sort_index()[closes.columns]
+
+def portfolio_risk(returns, weights, benchmark, confidence=0.95, periods_per_year=252):
+    """returns (봉, 종목) 수익률 행렬과 비중, 같은 봉의 지수 수익률로 포트폴리오 위험 지표를 낸다.
+    var·cvar 는 한 봉 기준 역사적 VaR·기대 손실(양수가 손실), volatility·annual_return 은 연율화 값."""
+    r = np.asarray(returns, dtype=float)
+    w = np.asarray(weights, dtype=float)
+    b = np.asarray(benchmark, dtype=float)
+    n = len(r) - 1
+    mean = r.mean(axis=0)
+    rc, bc = r - mean, b - b.mean()
+    cov = rc.T @ rc / n
+    vol = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.outer(vol, vol)
+        betas = rc.T @ bc / (bc @ bc)
+        marginal = cov @ w
+        port_var = w @ marginal
+        port = r @ w
+        cut = np.quantile(port, 1 - confidence)
+        return {
+            'cov': cov, 'corr': corr,
+            'volatility': vol * np.sqrt(periods_per_year),
+            'annual_return': mean * periods_per_year,
+            'beta': betas,
+            'risk_contribution': w * marginal / port_var,
+            'portfolio': {
+                'volatility': float(np.sqrt(port_var * periods_per_year)),
+                'annual_return': float(port.mean() * periods_per_year),
+                'var': float(-cut),
+                'cvar': float(-port[port <= cut].mean()),
+                'beta': float(w @ betas),
+                'diversification': float(np.abs(w) @ vol / np.sqrt(port_var)),
+                'bars': len(r),
+            },
+        }
+
+def safe_list(s):
+    a = np.round(np.asarray(s, dtype=float), 4)
+    return np.where(np.isnan(a), None, a).tolist()
+
+def epoch_days(index):
+    """거래소 현지 날짜 기준 1970-01-01 로부터의 일수."""
+    return index.tz_localize(None).as_unit('ns').asi8 // 86_400_000_000_000
+
+def epoch_minutes(index):
+    """거래소 현지 시각 기준 1970-01-01 00:00 으로부터의 분."""
+    return index.tz_localize(None).as_unit('ns').asi8 // 60_000_000_000
+
+def lttb_indices(y, n_out):
+    """Largest-Triangle-Three-Buckets 다운샘플링으로 남길 위치. 첫·마지막 점은 항상 남기고,
+    가운데를 n_out-2 개 구간으로 나눠 구간마다 앞에서 고른 점·다음 구간 평균과 만드는 삼각형이 가장 큰 점을 고른다."""
+    y = np.asarray(y, float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    ok = ~np.isnan(y)
+    if not ok.all():
+        y = np.interp(np.arange(n), np.flatnonzero(ok), y[ok]) if ok.any() else np.zeros(n)
+    # 구간 경계. 마지막 구간 [n-1, n) 은 끝점 하나
+    ends = np.append(np.linspace(1, n - 1, n_out - 1).astype(int), n)
+    csum = np.concatenate(([0.0], np.cumsum(y)))
+    cx = (ends[1:-1] + ends[2:] - 1) / 2
+    cy = (csum[ends[2:]] - csum[ends[1:-1]]) / (ends[2:] - ends[1:-1])
+    xs = np.arange(n, dtype=float)
+    out = np.empty(n_out, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = ends[i], ends[i + 1]
+        area = np.abs((a - cx[i]) * (y[lo:hi] - y[a]) - (a - xs[lo:hi]) * (cy[i] - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+def tail_aligned(closes, volumes, n):
+    """종목마다 유효한 봉만 아래로 당겨 마지막 n행을 남긴다. 거래일이 다른 시장이 섞여도 종목별 최근 n봉이 된다."""
+    c = closes.to_numpy(dtype=float)
+    order = np.argsort(~np.isnan(c), axis=0, kind='stable')
+    c = np.take_along_axis(c, order, axis=0)[-n:]
+    vol = np.take_along_axis(volumes.to_numpy(dtype=float), order, axis=0)[-n:]
+    return pd.DataFrame(c, columns=closes.columns), pd.DataFrame(vol, columns=closes.columns)
+
+class IncrementalIndicators:
+    """종목 하나의 지표 상태. 새 봉은 O(1)로 반영하고, 같은 시각의 봉이 다시 오면(장중 갱신) 마지막 봉만 교체한다.
+    calc_rsi / calc_macd / calc_bollinger 와 이동평균을 지금까지 넣은 봉 전체에 대해 계산한 값과 일치한다.
+    봉은 마지막으로 받은 hist 구간과 그 앞 margin 봉(가장 긴 창)만 남기고 버린다. EMA 는 버린 봉까지 반영한 값을 이어 간다."""
+    RESYNC_EVERY = 256
+    OUTPUTS = ('ema_fast', 'ema_slow', 'macd', 'signal', 'rsi', 'ma5', 'ma20', 'ma60', 'bb_upper', 'bb_lower')
+
+    def __init__(self, rsi_period=14, fast=12, slow=26, signal=9, bb_period=20, bb_std=2, vol_period=60):
+        self.rsi_period, self.bb_period, self.bb_std, self.vol_period = rsi_period, bb_period, bb_std, vol_period
+        self.alphas = (2 / (fast + 1), 2 / (slow + 1), 2 / (signal + 1))
+        self.windows = sorted({5, 20, 60, bb_period, vol_period})
+        self.margin = max(self.windows[-1], rsi_period + 1)
+        self.lock = threading.Lock()
+        self.n = 0
+        self._cap = 0
+        self.cols = {}
+        self._grow(128)
+
+    def _grow(self, cap):
+        cols = {'ts': np.zeros(cap, dtype=np.int64), 'close': np.zeros(cap), 'volume': np.zeros(cap)}
+        cols.update((k, np.full(cap, np.nan)) for k in self.OUTPUTS)
+        for k, a in self.cols.items():
+            cols[k][:self.n] = a[:self.n]
+        self.cols, self._cap = cols, cap
+
+    def reset(self):
+        self.n = 0
+        self.ref = None
+        self.sums = {k: 0.0 for k in self.windows}
+        self.sq = 0.0
+        self.vol_sum = 0.0
+        self.gain = self.loss = 0.0
+        self.loss_nz = 0
+        self.updates = 0
+
+    def _delta(self, i):
+        c = self.cols['close']
+        return c[i] - c[i - 1] if i >= 1 else np.nan
+
+    def _window(self, i, sign):
+        """봉 i를 창에 넣거나(sign=1) 뺀다(sign=-1). 창 밖으로 밀려나는 봉은 반대로 처리한다."""
+        c, vol, p = self.cols['close'], self.cols['volume'], self.rsi_period
+        x = c[i] - self.ref
+        for k in self.windows:
+            old = c[i - k] - self.ref if i >= k else 0.0
+            self.sums[k] += sign * (x - old)
+            if k == self.bb_period:
+                self.sq += sign * (x * x - old * old)
+        self.vol_sum += sign * (vol[i] - (vol[i - self.vol_period] if i >= self.vol_period else 0.0))
+        for j, s in ((i, sign), (i - p, -sign)):
+            d = self._delta(j) if j >= 1 else np.nan
+            if not np.isnan(d):
+                self.gain += s * max(d, 0.0)
+                self.loss += s * max(-d, 0.0)
+                self.loss_nz += s * (d < 0)
+
+    def _outputs(self, i):
+        o, c, ref = self.cols, self.cols['close'], self.ref
+        af, asl, asg = self.alphas
+        if i == 0:
+            ef = es = c[0]
+            macd = 0.0
+            sig = 0.0
+        else:
+            ef = o['ema_fast'][i - 1] + af * (c[i] - o['ema_fast'][i - 1])
+            es = o['ema_slow'][i - 1] + asl * (c[i] - o['ema_slow'][i - 1])
+            macd = ef - es
+            sig = o['signal'][i - 1] + asg * (macd - o['signal'][i - 1])
+        o['ema_fast'][i], o['ema_slow'][i], o['macd'][i], o['signal'][i] = ef, es, macd, sig
+        n = i + 1
+        for k in (5, 20, 60):
+            o[f'ma{k}'][i] = ref + self.sums[k] / k if n >= k else np.nan
+        p = self.rsi_period
+        if n > p and self.loss_nz > 0:
+            o['rsi'][i] = 100 - 100 / (1 + self.gain / self.loss)
+        else:
+            o['rsi'][i] = np.nan
+        k = self.bb_period
+        if n >= k:
+            mean = self.sums[k] / k
+            var = (self.sq - self.sums[k] * mean) / (k - 1)
+            # 반올림 오차 수준의 분산은 0으로 본다 (가격이 일정한 구간)
+            sd = np.sqrt(var) if var > 1e-12 * self.sq / k else 0.0
+            o['bb_upper'][i] = ref + mean + self.bb_std * sd
+            o['bb_lower'][i] = ref + mean - self.bb_std * sd
+        else:
+            o['bb_upper'][i] = o['bb_lower'][i] = np.nan
+
+    def push(self, ts, close, volume):
+        if self.n == 0:
+            self.reset()
+            self.ref = float(close)
+        if self.n == self._cap:
+            self._grow(self._cap * 2)
+        i = self.n
+        self.cols['ts'][i], self.cols['close'][i], self.cols['volume'][i] = ts, close, volume
+        self._window(i, 1)
+        self.n += 1
+        self._tick()
+        self._outputs(i)
+
+    def replace_last(self, close, volume):
+        i = self.n - 1
+        self._window(i, -1)
+        self.cols['close'][i], self.cols['volume'][i] = close, volume
+        self._window(i, 1)
+        self._tick()
+        self._outputs(i)
+
+    def _trim(self, start):
+        """앞쪽 start 봉을 버린다. 남는 봉이 margin 보다 많아 모든 창이 차 있으므로 누적 합은 그대로 쓴다."""
+        n = self.n - start
+        for a in self.cols.values():
+            a[:n] = a[start:self.n]
+        self.n = n
+
+    def _tick(self):
+        self.updates += 1
+        if self.updates % self.RESYNC_EVERY == 0:
+            self._resync()
+
+    def _resync(self):
+        """누적 합의 부동소수 오차를 없애기 위해 기준값을 최근 종가로 옮기고 창 합계를 저장된 봉에서 다시 계산한다."""
+        n = self.n
+        self.ref = float(self.cols['close'][n - 1])
+        c, vol = self.cols['close'][:n] - self.ref, self.cols['volume'][:n]
+        self.sums = {k: float(c[-k:].sum()) for k in self.windows}
+        self.sq = float((c[-self.bb_period:] ** 2).sum())
+        self.vol_sum = float(vol[-self.vol_period:].sum())
+        d = np.diff(c[max(n - self.rsi_period - 1, 0):])
+        self.gain, self.loss, self.loss_nz = float(d.clip(min=0).sum()), float(-d.clip(max=0).sum()), int((d < 0).sum())
+
+    def update(self, hist):
+        """history() 결과를 받아 아직 반영하지 않은 봉만 넣는다. 과거 봉이 바뀌었으면(수정주가 등) 처음부터 다시 만든다."""
+        return self.update_arrays(hist.index.as_unit('ns').asi8, hist['Close'].to_numpy(dtype=float), hist['Volume'].to_numpy(dtype=float))
+
+    def update_arrays(self, ts, closes, volumes):
+        """update 와 같고 봉을 (ns 시각, 종가, 거래량) 배열로 받는다. 종가가 NaN 인 봉(거래정지·미완성 봉)은 건너뛴다.
+        한 번 들어간 NaN 은 EMA 와 창 합계를 이후 모든 봉에서 NaN 으로 만들기 때문이다."""
+        ok = ~np.isnan(closes)
+        if not ok.all():
+            ts, closes, volumes = ts[ok], closes[ok], volumes[ok]
+        volumes = np.nan_to_num(volumes)
+        with self.lock:
+            start = 0
+            if self.n:
+                known_ts, known = self.cols['ts'][:self.n], self.cols['close'][:self.n]
+                pos = int(np.searchsorted(ts, known_ts[-1]))
+                first = int(np.searchsorted(known_ts, ts[0]))
+                if pos < len(ts) and ts[pos] == known_ts[-1] and first < self.n and known_ts[first] == ts[0] \
+                        and np.isclose(closes[0], known[first]) and (pos == 0 or np.isclose(closes[pos - 1], known[-2])):
+                    if closes[pos] != known[-1] or volumes[pos] != self.cols['volume'][self.n - 1]:
+                        self.replace_last(closes[pos], volumes[pos])
+                    start = pos + 1
+                else:
+                    self.n = 0
+            for i in range(start, len(ts)):
+                self.push(ts[i], closes[i], volumes[i])
+            first = int(np.searchsorted(self.cols['ts'][:self.n], ts[0])) if len(ts) else 0
+            if first > self.margin:
+                self._trim(first - self.margin)
+        return self
+
+    def snapshot(self, window=60):
+        """indicator_snapshot 과 같은 키의 최신 지표값과 마지막 window봉의 차트용 배열."""
+        with self.lock:
+            n, o = self.n, self.cols
+            c = o['close'][:n]
+            current, prev = float(c[-1]), float(c[-2]) if n >= 2 else np.nan
+            bb_u, bb_l = float(o['bb_upper'][n - 1]), float(o['bb_lower'][n - 1])
+            support, resistance = float(c[-20:].min()), float(c[-20:].max())
+            avg_vol = float(self.vol_sum) / min(n, self.vol_period)
+            ma60 = float(o['ma60'][n - 1])
+            v = {
+                'price': current,
+                'price_change': (current - prev) / prev * 100,
+                'rsi': float(o['rsi'][n - 1]),
+                'macd': float(o['macd'][n - 1]),
+                'macd_hist': float(o['macd'][n - 1] - o['signal'][n - 1]),
+                'bb_pos': (current - bb_l) / (bb_u - bb_l) * 100 if (bb_u - bb_l) > 0 else 50,
+                'ma5': float(o['ma5'][n - 1]),
+                'ma20': float(o['ma20'][n - 1]),
+                'ma60': float(o['ma20'][n - 1]) if np.isnan(ma60) else ma60,
+                'vol_ratio': float(o['volume'][n - 1]) / avg_vol if avg_vol > 0 else 1,
+                'dist_sup': (current - support) / support * 100,
+                'dist_res': (resistance - current) / resistance * 100,
+            }
+            series = {k: o[k][max(n - window, 0):n].copy() for k in ('ma5', 'ma20', 'bb_upper', 'bb_lower')}
+        return v, series
+
+_engines = OrderedDict()
+_engines_lock = threading.Lock()
+_engines_reserved = 0
+
+def reserve_engines(n):
+    """CACHE_SIZE 와 별도로 n 개 엔진을 더 남겨 둔다. 스크리너가 universe 몫을 잡아 /analyze 와 엔진을 함께 쓴다."""
+    global _engines_reserved
+    _engines_reserved = n
+
+def engine_for(key):
+    with _engines_lock:
+        eng = _engines.get(key)
+        if eng is None:
+            eng = _engines[key] = IncrementalIndicators()
+            while len(_engines) > CACHE_SIZE + _engines_reserved:
+                _engines.popitem(last=False)
+        _engines.move_to_end(key)
+    return eng
+
+def indicator_engine(key, hist):
+    return engine_for(key).update(hist)
+
+def market_of(ticker):
+    return 'KR' if ticker.endswith('.KS') or ticker.endswith('.KQ') or ticker in KR_INDICES else 'US'
+
+def is_market_open(ticker, now=None):
+    tz, start, end = MARKETS[market_of(ticker)]
+    now = (now or datetime.datetime.now(datetime.timezone.utc)).astimezone(ZoneInfo(tz))
+    return now.weekday() < 5 and start <= now.time() < end
+
+def seconds_until_open(ticker, now=None):
+    """다음 정규장 시작까지 남은 초 (주말은 건너뛰고 휴장일은 고려하지 않는다)."""
+    tz, start, _ = MARKETS[market_of(ticker)]
+    now = (now or datetime.datetime.now(datetime.timezone.utc)).astimezone(ZoneInfo(tz))
+    day = now.date() + datetime.timedelta(days=now.time() >= start)
+    while day.weekday() >= 5:
+        day += datetime.timedelta(days=1)
+    opens = datetime.datetime.combine(day, start, now.tzinfo).astimezone(datetime.timezone.utc)
+    return (opens - now.astimezone(datetime.timezone.utc)).total_seconds()
+
+def market_ttl(ticker, now=None):
+    """장중에는 TTL_OPEN. 장외에는 TTL_CLOSED 이되 개장 전에 받은 값이 개장 뒤까지 남지 않도록 개장 시각에서 끊는다."""
+    if is_market_open(ticker, now):
+        return TTL_OPEN
+    return max(min(TTL_CLOSED, seconds_until_open(ticker, now)), 1.0)
+
+class _Flight:
+    """진행 중인 upstream 요청 하나. 같은 키의 동시 요청은 이 결과를 함께 기다린다."""
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+    def wait(self):
+        self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+def resolve_ttl(ttl):
+    """캐시 TTL 은 초 또는 로드가 끝난 뒤 부르는 함수(방금 읽은 값에 따라 정할 때)."""
+    return ttl() if callable(ttl) else ttl
+
+_stale = threading.local()
+
+def stale_age():
+    """이 스레드가 reset_stale() 뒤에 캐시에서 받은 만료된 값 중 가장 오래된 것의 나이(초). 없으면 None."""
+    return getattr(_stale, 'age', None)
+
+def reset_stale():
+    _stale.age = None
+
+class TTLCache:
+    """크기 제한 + LRU 퇴출 + 항목별 TTL 캐시. 같은 키의 동시 미스는 한 번의 로드로 합친다.
+    만료 뒤 stale_ttl 초 안의 항목은 옛 값을 바로 돌려주고(stale-while-revalidate) refresher 에서 한 번만 다시 읽는다.
+    다시 읽기가 실패하면 옛 값을 계속 준다. shared(SharedCache) 가 있으면 로드하기 전에 다른 워커가 받아 둔 값을 먼저 찾는다."""
+    def __init__(self, maxsize, stale_ttl=0, refresher=None, shared=None, name=''):
+        self.maxsize, self.stale_ttl, self.refresher = maxsize, stale_ttl, refresher
+        self.shared, self.name = shared, name
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.waits = self.evictions = self.stale = self.refresh_errors = 0
+
+    def get_or_load(self, key, loader, ttl):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            flight = self._inflight.get(key)
+            if entry is not None and self.refresher is not None and entry[0] + self.stale_ttl > now:
+                self._data.move_to_end(key)
+                self.stale += 1
+                _stale.age = max(getattr(_stale, 'age', None) or 0, now - entry[2])
+                if flight is None:
+                    flight = self._inflight[key] = _Flight()
+                    self.refresher.submit(self._load, key, flight, loader, ttl)
+                return entry[1]
+            owner = flight is None
+            if owner:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.waits += 1
+        if owner:
+            self._load(key, flight, loader, ttl)
+        return flight.wait()
+
+    def _fetch(self, key, loader, ttl):
+        """(값, 남은 TTL, 값의 나이). loader 가 다른 캐시에서 stale 값을 받아 만든 값(stale 일봉을 합친 주봉 등)은
+        그 재료만큼 묵은 것이므로 TTL 0 으로, 즉 만료된 채로 넣어 다음 조회가 stale 로 표시하고 다시 만들게 한다."""
+        outer = stale_age()
+        reset_stale()
+        fresh_ttl = lambda: ttl if stale_age() is None else 0.0
+        try:
+            if self.shared is None:
+                value = loader()
+                return value, fresh_ttl(), stale_age() or 0.0
+            value, expires, stored = self.shared.get_or_load(f'{self.name}:{hashlib.sha1(repr(key).encode()).hexdigest()}',
+                                                             loader, fresh_ttl, self.stale_ttl)
+            now = time.time()
+            if expires <= now:      # 다른 워커가 새로 읽는 중이라 받은 stale 값
+                _stale.age = max(stale_age() or 0, now - stored)
+            return value, expires - now, max(now - stored, stale_age() or 0)
+        finally:
+            ages = [a for a in (outer, stale_age()) if a is not None]
+            _stale.age = max(ages) if ages else None
+
+    def _load(self, key, flight, loader, ttl):
+        try:
+            flight.value, remaining, age = self._fetch(key, loader, ttl)
+        except Exception as e:
+            flight.error = e
+        with self._lock:
+            if flight.error is None:
+                now = time.monotonic()
+                self._data[key] = (now + remaining, flight.value, now - age)
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+            elif key in self._data:
+                self.refresh_errors += 1
+            del self._inflight[key]
+        flight.event.set()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.waits + self.stale
+            return {
+                'size': len(self._data), 'maxsize': self.maxsize,
+                'hits': self.hits, 'misses': self.misses, 'waits': self.waits, 'stale': self.stale,
+                'evictions': self.evictions, 'refresh_errors': self.refresh_errors,
+                'hit_ratio': round((self.hits + self.waits + self.stale) / lookups, 4) if lookups else 0.0,
+            }
+
+class SharedCache:
+    """여러 워커 프로세스가 함께 보는 2차 캐시 인터페이스. TTLCache 가 자기 메모리에 없을 때만 찾는다.
+    시각은 프로세스 사이에서 같아야 하므로 time.time() 을 쓴다. Redis 등 다른 저장소는 아래 네 메서드만 구현하면 된다."""
+    def __init__(self):
+        self.hits = self.misses = self.waits = self.stale = 0
+
+    def get(self, key):
+        """(값, 만료 시각, 저장 시각) 또는 None."""
+        raise NotImplementedError
+
+    def set(self, key, value, expires, keep_until):
+        """keep_until 까지 (만료된 뒤에도 stale 로 쓰도록) 보관한다."""
+        raise NotImplementedError
+
+    def acquire(self, key, lease):
+        """key 를 새로 읽을 권리. 다른 워커가 lease 초 안에 잡은 상태면 False. 이미 잡은 스레드가 다시 부르면 lease 를 연장한다."""
+        raise NotImplementedError
+
+    def release(self, key):
+        raise NotImplementedError
+
+    def get_or_load(self, key, loader, ttl, stale_ttl=0, wait=UPSTREAM_TIMEOUT):
+        """get → 없거나 만료면 잠금을 잡은 한 워커만 loader 를 부른다. 다른 워커는 stale 값이 있으면 그것을 쓰고,
+        없으면 wait 초까지 결과가 들어오길 기다렸다가 그래도 없으면 직접 읽는다. (값, 만료 시각, 저장 시각)."""
+        row = self.get(key)
+        if row is not None and row[1] > time.time():
+            self.hits += 1
+            return row
+        deadline = time.monotonic() + wait
+        delay = 0.02
+        while True:
+            if self.acquire(key, lease=max(wait * 3, 10)):
+                try:
+                    row = self.get(key)
+                    if row is not None and row[1] > time.time():
+                        self.hits += 1
+                        return row
+                    self.misses += 1
+                    value, now = loader(), time.time()
+                    ttl = resolve_ttl(ttl)
+                    self.set(key, value, now + ttl, now + ttl + stale_ttl)
+                    return value, now + ttl, now
+                finally:
+                    self.release(key)
+            if row is not None and row[1] + stale_ttl > time.time():
+                self.stale += 1
+                return row
+            if time.monotonic() > deadline:
+                self.misses += 1
+                value, now = loader(), time.time()
+                ttl = resolve_ttl(ttl)
+                self.set(key, value, now + ttl, now + ttl + stale_ttl)
+                return value, now + ttl, now
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+            self.waits += 1
+            row = self.get(key)
+            if row is not None and row[1] > time.time():
+                self.hits += 1
+                return row
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'waits': self.waits, 'stale': self.stale}
+
+class SQLiteCache(SharedCache):
+    """WAL 모드 SQLite 파일 하나를 워커들이 함께 쓰는 SharedCache. 값은 pickle 로 저장하고(같은 서버의 프로세스끼리만 쓴다),
+    잠금은 만료 시각이 있는 행이라 잠근 워커가 죽어도 lease 가 지나면 풀린다. 연결은 스레드·프로세스마다 따로 연다."""
+    PURGE_EVERY = 200
+
+    def __init__(self, path, namespace=''):
+        super().__init__()
+        self.path, self.namespace = path, namespace
+        self._local = threading.local()
+        self._pid = None
+        self._writes = itertools.count()
+
+    def _db(self):
+        if self._pid != os.getpid():     # fork 로 물려받은 연결은 쓰지 않는다
+            self._pid, self._local = os.getpid(), threading.local()
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            db = self._local.db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, expires REAL, keep REAL, stored REAL, value BLOB)')
+            db.execute('CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, owner TEXT, until REAL)')
+        return db
+
+    def _key(self, key):
+        return f'{self.namespace}:{key}'
+
+    def _owner(self):
+        return f'{os.getpid()}:{threading.get_ident()}'
+
+    def get(self, key):
+        row = self._db().execute('SELECT value, expires, stored FROM entries WHERE key = ? AND keep > ?',
+                                 (self._key(key), time.time())).fetchone()
+        return None if row is None else (pickle.loads(row[0]), row[1], row[2])
+
+    def set(self, key, value, expires, keep_until):
+        db = self._db()
+        db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                   (self._key(key), expires, keep_until, time.time(), pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+        if next(self._writes) % self.PURGE_EVERY == 0:
+            db.execute('DELETE FROM entries WHERE keep < ?', (time.time(),))
+
+    def acquire(self, key, lease):
+        now = time.time()
+        cur = self._db().execute(
+            'INSERT INTO locks VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, until = excluded.until '
+            'WHERE locks.until < ? OR locks.owner = excluded.owner', (self._key(key), self._owner(), now + lease, now))
+        return cur.rowcount == 1
+
+    def release(self, key):
+        self._db().execute('DELETE FROM locks WHERE key = ? AND owner = ?', (self._key(key), self._owner()))
+
+def make_shared_cache(spec):
+    """STOCKSCAN_SHARED_CACHE: '0' 이면 끔, 'sqlite'(기본) 면 DATA_DIR/cache.sqlite, 그 밖에는 SQLite 파일 경로.
+    공급자 설정이 다른 프로세스(예: 픽스처로 띄운 벤치마크)와 값이 섞이지 않게 키 앞에 공급자 설정을 붙인다."""
+    if spec in ('', '0'):
+        return None
+    namespace = ':'.join(os.environ.get(k, '') for k in ('STOCKSCAN_PROVIDER', 'STOCKSCAN_FIXTURE_DIR', 'STOCKSCAN_FIXTURE_SEED'))
+    return SQLiteCache(os.path.join(DATA_DIR, 'cache.sqlite') if spec == 'sqlite' else spec, namespace)
+
+class MarketDataProvider:
+    """시세·종목정보·뉴스 공급자 인터페이스. 라우트와 캐시는 이 메서드들만 사용한다."""
+    def history(self, ticker, period=None, start=None, interval='1d'):
+        raise NotImplementedError
+
+    def info(self, ticker):
+        raise NotImplementedError
+
+    def news(self, ticker):
+        raise NotImplementedError
+
+    def download(self, tickers, period):
+        """여러 종목의 history 를 (필드, 티커) 2단 열의 넓은 DataFrame 으로 합친다."""
+        frames = {t: self.history(t, period=period) for t in tickers}
+        frames = {t: f for t, f in frames.items() if not f.empty}
+        if not frames:
+            return pd.DataFrame(columns=pd.MultiIndex.from_product([['Close', 'Volume'], tickers]))
+        return pd.concat(frames, axis=1, sort=True).swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+class YFinanceProvider(MarketDataProvider):
+    def history(self, ticker, period=None, start=None, interval='1d'):
+        kwargs = {'start': start} if start else {'period': period}
+        return yf.Ticker(ticker).history(interval=interval, **kwargs)
+
+    def info(self, ticker):
+        return yf.Ticker(ticker).info or {}
+
+    def news(self, ticker):
+        return yf.Ticker(ticker).news or []
+
+    def download(self, tickers, period):
+        return yf.download(tickers, period=period, auto_adjust=True, group_by='column', progress=False, threads=True)
+
+class FixtureProvider(MarketDataProvider):
+    """네트워크 없이 벤치마크·부하 테스트를 하기 위한 공급자.
+    root 에 녹화된 <티커>.csv (분봉은 <티커>.<간격>.csv) / <티커>.info.json / <티커>.news.json 이 있으면 그것을, 없으면 티커별로 고정된
+    합성 랜덤워크 시세와 뉴스를 돌려준다. 모든 호출은 latency 초(±jitter 비율) 만큼 늦게 응답한다."""
+    HEADLINES = [
+        '{t} 주가 급등, 분기 실적 호조', '{t} 신제품 출시 발표', '{t} 목표주가 하향 조정', '{t} 소송 리스크 우려 확대',
+        '{t} shares surge after earnings beat', '{t} stock falls on weak guidance', '{t} announces new partnership deal',
+        '{t} faces regulatory concern', '{t} hits record high', '{t} trading flat ahead of results',
+    ]
+
+    def __init__(self, root=None, latency=0.0, jitter=0.0, seed=0, bars=1500):
+        self.root, self.latency, self.jitter, self.seed, self.bars = root, latency, jitter, seed, bars
+        self._series = {}
+        self._days = {}
+        self._lock = threading.Lock()
+        self._rng = None
+
+    def _sleep(self):
+        if self.latency > 0:
+            with self._lock:
+                if self._rng is None:
+                    self._rng = np.random.default_rng(self.seed)
+                j = self._rng.uniform(-self.jitter, self.jitter)
+            time.sleep(self.latency * (1 + j))
+
+    def _fixture(self, ticker, suffix):
+        path = os.path.join(self.root, re.sub(r'[^A-Za-z0-9^=._-]', '_', ticker) + suffix) if self.root else None
+        return path if path and os.path.exists(path) else None
+
+    def _ticker_rng(self, ticker):
+        return np.random.default_rng([self.seed] + list(ticker.encode()))
+
+    def _synthetic(self, ticker, interval='1d'):
+        tz, open_, close_ = MARKETS[market_of(ticker)]
+        rng = self._ticker_rng(ticker)
+        now = pd.Timestamp.now(tz=tz)
+        if interval == '1d':
+            # tz 가 붙은 bdate_range 는 느려서 시장·날짜별로 한 번만 만든다
+            key = (tz, now.date())
+            index = self._days.get(key)
+            if index is None:
+                index = self._days[key] = pd.bdate_range(end=now.normalize(), periods=self.bars)
+            scale = 1.0
+        else:
+            # upstream 이 주는 기간만큼의 거래일마다 정규장 시간 분봉. 하루 변동폭은 일봉과 같게 맞춘다
+            offsets = np.arange(open_.hour * 60 + open_.minute, close_.hour * 60 + close_.minute, INTERVAL_MINUTES[interval])
+            days = pd.bdate_range(end=now.tz_localize(None).normalize(), periods=int(dict(INTRADAY_BASES)[interval][:-1]) * 5 // 7 + 1)
+            index = pd.DatetimeIndex((days.values[:, None] + offsets * np.timedelta64(1, 'm')).ravel()).tz_localize(tz)
+            index, scale = index[index <= now], 1 / np.sqrt(len(offsets))
+        n = len(index)
+        close = rng.uniform(20, 500) * np.exp(np.cumsum(rng.normal(0.0003 * scale ** 2, rng.uniform(0.01, 0.03) * scale, n)))
+        spread = np.abs(rng.normal(0, 0.01, n)) * close
+        open_ = close * (1 + rng.normal(0, 0.005, n))
+        return pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) + spread,
+            'Low': np.minimum(open_, close) - spread,
+            'Close': close,
+            'Volume': rng.lognormal(13, 0.5, n).round(),
+        }, index=index)
+
+    def _load_history(self, ticker, interval='1d'):
+        with self._lock:
+            hist = self._series.get((ticker, interval))
+        if hist is None:
+            path = self._fixture(ticker, '.csv' if interval == '1d' else f'.{interval}.csv')
+            if path:
+                hist = pd.read_csv(path, index_col=0)
+                hist.index = pd.DatetimeIndex(pd.to_datetime(hist.index, utc=True)).tz_convert(MARKETS[market_of(ticker)][0])
+            else:
+                hist = self._synthetic(ticker, interval)
+            with self._lock:
+                self._series[(ticker, interval)] = hist
+        return hist
+
+    def history(self, ticker, period=None, start=None, interval='1d'):
+        self._sleep()
+        hist = self._load_history(ticker, interval)
+        since = pd.Timestamp(start, tz=hist.index.tz) if start else period_start(period or '1mo', hist.index.tz).normalize()
+        return hist[hist.index >= since].copy()
+
+    def info(self, ticker):
+        self._sleep()
+        path = self._fixture(ticker, '.info.json')
+        if path:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        return {'shortName': f'{ticker} (synthetic)', 'symbol': ticker}
+
+    def news(self, ticker):
+        self._sleep()
+        path = self._fixture(ticker, '.news.json')
+        if path:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        rng = self._ticker_rng(ticker)
+        now = int(time.time())
+        return [{'title': self.HEADLINES[i].format(t=ticker), 'link': f'https://example.com/{ticker}/{i}',
+                 'publisher': 'STOCKSCAN fixture', 'providerPublishTime': now - 3600 * k}
+                for k, i in enumerate(rng.permutation(len(self.HEADLINES))[:8])]
+
+def record_fixtures(tickers, root, period='1y'):
+    """실제 yfinance 응답을 FixtureProvider 가 읽는 형식으로 저장한다."""
+    os.makedirs(root, exist_ok=True)
+    src = YFinanceProvider()
+    for ticker in tickers:
+        base = os.path.join(root, re.sub(r'[^A-Za-z0-9^=._-]', '_', ticker))
+        src.history(ticker, period=period).to_csv(base + '.csv')
+        with open(base + '.info.json', 'w', encoding='utf-8') as f:
+            json.dump(src.info(ticker), f, ensure_ascii=False, default=str)
+        with open(base + '.news.json', 'w', encoding='utf-8') as f:
+            json.dump(src.news(ticker), f, ensure_ascii=False, default=str)
+        print(f'  {ticker} → {base}.csv')
+
+def run_sweep(tickers, period, space, n_random=0, seed=0, workers=None, horizon=5, cost=0.0, short=False,
+              objective='sharpe', top=10, out=None):
+    """sweep CLI. 결과는 끝나는 대로 out(기본 표준출력)에 한 줄에 하나씩 JSON 으로 쓰고, 진행 상황과 상위 조합은 stderr 로 보인다."""
+    data = provider.download(tickers, period)
+    closes, volumes = tail_aligned(data['Close'].reindex(columns=tickers), data['Volume'].reindex(columns=tickers), len(data))
+    combos = sweep_combos(space, n_random, seed)
+    print(f'  {len(tickers)}종목 × {len(closes)}봉, {len(combos)}개 조합', file=sys.stderr)
+    rows, t0 = [], time.monotonic()
+    f = open(out, 'w', encoding='utf-8') if out else sys.stdout
+    try:
+        for row in sweep(closes, volumes, combos, workers, horizon, cost, short):
+            rows.append(row)
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+            f.flush()
+            print(f'\r  {len(rows)}/{len(combos)}  {time.monotonic() - t0:.1f}s', end='', file=sys.stderr)
+    finally:
+        if out:
+            f.close()
+    print(file=sys.stderr)
+    rows.sort(key=lambda r: -np.inf if r[objective] is None else r[objective], reverse=True)
+    for row in rows[:top]:
+        params = ' '.join(f'{k}={row[k]}' for k in space)
+        print(f'  {objective}={row[objective]}  {params}', file=sys.stderr)
+    return rows
+
+def make_provider():
+    name = os.environ.get('STOCKSCAN_PROVIDER', 'yfinance')
+    if name == 'fixture':
+        return FixtureProvider(
+            root=os.environ.get('STOCKSCAN_FIXTURE_DIR'),
+            latency=float(os.environ.get('STOCKSCAN_FIXTURE_LATENCY', 0)),
+            jitter=float(os.environ.get('STOCKSCAN_FIXTURE_JITTER', 0)),
+            seed=int(os.environ.get('STOCKSCAN_FIXTURE_SEED', 0)),
+        )
+    if name != 'yfinance':
+        raise ValueError(f'알 수 없는 STOCKSCAN_PROVIDER: {name}')
+    return YFinanceProvider()
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class Metrics:
+    """프로세스 내 카운터와 소요 시간 히스토그램. /metrics 에서 Prometheus 텍스트 형식으로 내보낸다."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+            i = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+            if i < len(LATENCY_BUCKETS):
+                h[i] += 1
+            h[-2] += seconds
+            h[-1] += 1
+
+    def render(self, caches=(), breakers=()):
+        fmt = lambda labels: '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}' if labels else ''
+        lines, typed = [], set()
+
+        def emit(name, kind, labels, value):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name}{fmt(labels)} {value}')
+
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((k, list(h)) for k, h in self.histograms.items())
+        for (name, labels), value in counters:
+            emit(name, 'counter', labels, value)
+        for (name, labels), h in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} histogram')
+            total = 0
+            for bound, count in zip(LATENCY_BUCKETS, h):
+                total += count
+                lines.append(f'{name}_bucket{fmt(labels + (("le", bound),))} {total}')
+            lines.append(f'{name}_bucket{fmt(labels + (("le", "+Inf"),))} {h[-1]}')
+            lines.append(f'{name}_sum{fmt(labels)} {h[-2]:.6f}')
+            lines.append(f'{name}_count{fmt(labels)} {h[-1]}')
+        for cache_name, cache in caches:
+            st = cache.stats()
+            for result in ('hits', 'misses', 'waits', 'stale'):
+                emit('stockscan_cache_requests_total', 'counter', (('cache', cache_name), ('result', result)), st[result])
+            emit('stockscan_cache_evictions_total', 'counter', (('cache', cache_name),), st['evictions'])
+            emit('stockscan_cache_entries', 'gauge', (('cache', cache_name),), st['size'])
+            emit('stockscan_cache_hit_ratio', 'gauge', (('cache', cache_name),), st['hit_ratio'])
+        for call, breaker in breakers:
+            emit('stockscan_breaker_open', 'gauge', (('call', call),), int(breaker.state() != 'closed'))
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+
+def record(stage, seconds):
+    if not METRICS_ENABLED:
+        return
+    metrics.observe('stockscan_stage_seconds', seconds, stage=stage)
+    if has_request_context() and 'timings' in g:
+        g.timings.append((stage, seconds))
+
+class _Span:
+    __slots__ = ('stage', 't0')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.stage, time.perf_counter() - self.t0)
+
+_NO_SPAN = contextlib.nullcontext()
+
+def span(stage):
+    """analyze()/get_news() 의 단계별 소요 시간을 잰다. STOCKSCAN_METRICS=0 이면 아무것도 하지 않는다."""
+    return _Span(stage) if METRICS_ENABLED else _NO_SPAN
+
+class InstrumentedProvider(MarketDataProvider):
+    """실제 upstream 호출(캐시 미스) 횟수·오류·소요 시간을 센다."""
+    def __init__(self, inner):
+        self.inner = inner
+
+    def _call(self, call, fn, *args, **kwargs):
+        t = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            metrics.inc('stockscan_upstream_errors_total', call=call)
+            raise
+        finally:
+            metrics.inc('stockscan_upstream_calls_total', call=call)
+            metrics.observe('stockscan_upstream_seconds', time.perf_counter() - t, call=call)
+
+    def history(self, ticker, period=None, start=None, interval='1d'):
+        return self._call('history', self.inner.history, ticker, period=period, start=start, interval=interval)
+
+    def info(self, ticker):
+        return self._call('info', self.inner.info, ticker)
+
+    def news(self, ticker):
+        return self._call('news', self.inner.news, ticker)
+
+    def download(self, tickers, period):
+        return self._call('download', self.inner.download, tickers, period)
+
+class UpstreamUnavailable(Exception):
+    pass
+
+# 다시 불러도 같은 답이 오는 yfinance 오류 (없는 종목·잘못된 기간)
+PERMANENT_ERRORS = ('YFPricesMissingError', 'YFTzMissingError', 'YFTickerMissingError', 'YFInvalidPeriodError')
+
+def is_transient(exc):
+    """재시도하고 차단기에 셀 일시 장애인가. 4xx(429 제외)·없는 종목·잘못된 인자는 upstream 이 정상으로 답한 것이라 아니다."""
+    status = getattr(getattr(exc, 'response', None), 'status_code', None) or getattr(exc, 'code', None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return status == 429
+    if isinstance(exc, json.JSONDecodeError):   # 레이트 리밋 때 오는 HTML 같은 깨진 응답
+        return True
+    return not isinstance(exc, (LookupError, ValueError, TypeError)) and type(exc).__name__ not in PERMANENT_ERRORS
+
+class CircuitBreaker:
+    """upstream 호출 종류 하나의 차단기. 연속 threshold 번 실패하면 cooldown 초 동안 호출을 바로 거절(open)하고,
+    그 뒤 한 호출만 시험으로 통과시킨다(half-open). 성공하면 닫고, 실패하면 cooldown 을 두 배로(최대 max_cooldown) 늘려 다시 연다."""
+    def __init__(self, name, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, max_cooldown=300):
+        self.name, self.threshold, self.base_cooldown, self.max_cooldown = name, threshold, cooldown, max_cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    def before(self):
+        with self.lock:
+            if self.open_until is None:
+                return
+            wait = self.open_until - time.monotonic()
+            if wait > 0 or self.trial:
+                metrics.inc('stockscan_breaker_rejections_total', call=self.name)
+                raise UpstreamUnavailable(f'데이터 공급처 응답 장애로 {self.name} 요청을 잠시 중단했습니다 ({max(wait, 1):.0f}초 후 재시도)')
+            self.trial = True
+
+    def success(self):
+        with self.lock:
+            self.failures, self.open_until, self.trial, self.cooldown = 0, None, False, self.base_cooldown
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial or (self.open_until is None and self.failures >= self.threshold):
+                if self.trial:
+                    self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self.open_until, self.trial = time.monotonic() + self.cooldown, False
+                metrics.inc('stockscan_breaker_opened_total', call=self.name)
+
+    def state(self):
+        with self.lock:
+            if self.open_until is None:
+                return 'closed'
+            return 'half_open' if self.trial or self.open_until <= time.monotonic() else 'open'
+
+class ResilientProvider(MarketDataProvider):
+    """일시 장애로 실패한 upstream 호출을 지터를 넣은 지수 백오프로 retries 번까지 다시 하고, 호출 종류별 CircuitBreaker 가
+    열려 있으면 upstream 을 부르지 않고 바로 UpstreamUnavailable 을 낸다. 차단기에는 재시도까지 다 실패한 호출만 한 번 센다."""
+    def __init__(self, inner, retries=RETRIES, base=RETRY_BASE, cap=RETRY_MAX):
+        self.inner, self.retries, self.base, self.cap = inner, retries, base, cap
+        self.breakers = {call: CircuitBreaker(call) for call in ('history', 'info', 'news', 'download')}
+
+    def _call(self, call, fn, *args, **kwargs):
+        breaker = self.breakers[call]
+        breaker.before()
+        for attempt in range(self.retries + 1):
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_transient(e):
+                    breaker.success()   # upstream 은 답했다 (half-open 시험 호출도 여기서 끝난다)
+                    raise
+                if attempt == self.retries:
+                    breaker.failure()
+                    raise
+                metrics.inc('stockscan_upstream_retries_total', call=call)
+                # full jitter: 같은 순간 실패한 요청들이 한꺼번에 다시 몰리지 않게 한다
+                time.sleep(random.uniform(0, min(self.cap, self.base * 2 ** attempt)))
+            else:
+                breaker.success()
+                return result
+
+    def history(self, ticker, period=None, start=None, interval='1d'):
+        return self._call('history', self.inner.history, ticker, period=period, start=start, interval=interval)
+
+    def info(self, ticker):
+        return self._call('info', self.inner.info, ticker)
+
+    def news(self, ticker):
+        return self._call('news', self.inner.news, ticker)
+
+    def download(self, tickers, period):
+        return self._call('download', self.inner.download, tickers, period)
+
+class PriceStore:
+    """종목별 OHLCV 봉 파일 저장소. 파일 하나가 고정 길이 레코드 배열이라 np.memmap 으로 바로 읽고,
+    새 봉은 끝에 덧붙인다. 파일 잠금으로 gunicorn 워커들이 같은 디렉터리를 함께 쓴다."""
+    FIELDS = ('ts', 'Open', 'High', 'Low', 'Close', 'Volume')
+
+    def __init__(self, root):
+        self.root = root
+
+    @functools.cached_property
+    def dtype(self):
+        return np.dtype([('ts', '<i8')] + [(f, '<f8') for f in self.FIELDS[1:]])
+
+    def _path(self, ticker, interval='1d'):
+        return os.path.join(self.root, re.sub(r'[^A-Za-z0-9^=._-]', '_', ticker) + f'.{interval}')
+
+    def _locked(self, path, exclusive):
+        os.makedirs(self.root, exist_ok=True)
+        f = open(path + '.lock', 'a')
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return f
+
+    def load(self, ticker, interval='1d'):
+        """저장된 봉과 거래소 타임존. 없으면 (빈 배열, None)."""
+        path = self._path(ticker, interval)
+        if not os.path.exists(path + '.bars'):
+            return np.empty(0, dtype=self.dtype), None
+        with self._locked(path, exclusive=False):
+            n = os.path.getsize(path + '.bars') // self.dtype.itemsize
+            bars = np.array(np.memmap(path + '.bars', dtype=self.dtype, mode='r', shape=(n,))) if n else np.empty(0, dtype=self.dtype)
+            with open(path + '.json') as f:
+                tz = json.load(f)['tz']
+        return bars, tz
+
+    def merge(self, ticker, hist, interval='1d', replace=False):
+        """hist 의 첫 봉 이후로 저장된 봉을 hist 로 교체한다. 보통은 마지막 한두 봉만 다시 쓰고 나머지는 덧붙인다.
+        replace 면 hist 보다 앞선 봉까지 모두 버린다(수정주가로 과거가 통째로 바뀐 경우)."""
+        path = self._path(ticker, interval)
+        new = np.empty(len(hist), dtype=self.dtype)
+        new['ts'] = hist.index.as_unit('ns').asi8
+        for f in self.FIELDS[1:]:
+            new[f] = hist[f].to_numpy(dtype=float)
+        with self._locked(path, exclusive=True):
+            with open(path + '.bars', 'a+b') as f:
+                n = os.path.getsize(path + '.bars') // self.dtype.itemsize
+                old = np.memmap(path + '.bars', dtype=self.dtype, mode='r', shape=(n,)) if n else np.empty(0, dtype=self.dtype)
+                cut = 0 if replace else int(np.searchsorted(old['ts'], new['ts'][0])) if len(new) else n
+                del old
+                f.truncate(cut * self.dtype.itemsize)
+                f.write(new.tobytes())
+            with open(path + '.json', 'w') as f:
+                json.dump({'tz': str(hist.index.tz)}, f)
+
+    def frame(self, bars, tz):
+        index = pd.DatetimeIndex(pd.to_datetime(bars['ts'], utc=True)).tz_convert(tz)
+        return pd.DataFrame({f: bars[f] for f in self.FIELDS[1:]}, index=index)
+
+PERIOD_DAYS = {'d': 1, 'wk': 7, 'mo': 31, 'y': 366}
+
+def parse_period(period):
+    m = re.fullmatch(r'([1-9]\d*)(d|wk|mo|y)', period or '')
+    if not m:
+        raise ValueError(f'지원하지 않는 기간입니다: {period}')
+    return int(m.group(1)), m.group(2)
+
+def period_start(period, tz, now=None):
+    """yfinance period 문자열(5d, 4mo, 1y...)이 가리키는 시작 시각. now 를 주면 그 시각 기준."""
+    n, unit = parse_period(period)
+    offset = {'d': pd.DateOffset(days=n), 'wk': pd.DateOffset(weeks=n), 'mo': pd.DateOffset(months=n), 'y': pd.DateOffset(years=n)}[unit]
+    return (pd.Timestamp.now(tz=tz) if now is None else now) - offset
+
+def history_plan(period, interval):
+    """(upstream 에서 받을 기본 봉 간격, 받을 기간). 1d 이상은 일봉을 받아 합치고, 분봉은 기간을 덮는 가장 촘촘한
+    기본 분봉을 upstream 이 주는 최대 기간만큼 받아 합친다. 같은 종목의 여러 간격이 다운로드 하나를 함께 쓴다.
+    차트 첫 봉부터 지표가 채워지도록 WARMUP_BARS 봉만큼 앞을 더 받는다."""
+    minutes = INTERVAL_MINUTES.get(interval)
+    if minutes is None:
+        raise ValueError(f'지원하지 않는 봉 간격입니다: {interval}')
+    n, unit = parse_period(period)
+    days = n * PERIOD_DAYS[unit]
+    if minutes >= 1440:
+        # 일봉은 거래일 기준이라 달력일로 7/5 배, 주봉·월봉은 이미 달력 기준
+        warmup = WARMUP_BARS * 7 // 5 if minutes == 1440 else WARMUP_BARS * minutes // 1440
+        return '1d', f'{days + warmup + 7}d'
+    warmup = WARMUP_BARS * minutes // 390 * 7 // 5 + 4   # 하루 정규장 약 390분
+    bases = [(b, int(limit[:-1])) for b, limit in INTRADAY_BASES if minutes % INTERVAL_MINUTES[b] == 0]
+    for base, cap in [b for b in bases if days + warmup <= b[1]] + [b for b in bases if days <= b[1]]:
+        return base, f'{cap}d'
+    raise ValueError(f'{interval} 봉은 최근 {max(cap for _, cap in bases)}일까지만 조회할 수 있습니다.')
+
+OHLCV_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+def resample_bars(hist, interval, ticker):
+    """기본 봉을 interval 봉으로 합친다. 분봉 구간은 정규장 시작 시각부터, 주봉은 월요일, 월봉은 1일부터 센다."""
+    if hist.empty:
+        return hist
+    minutes = INTERVAL_MINUTES[interval]
+    if minutes < 1440:
+        open_ = MARKETS[market_of(ticker)][1]
+        bins = hist.resample(f'{minutes}min', origin='start_day', offset=pd.Timedelta(hours=open_.hour, minutes=open_.minute))
+    elif interval == '1wk':
+        bins = hist.resample('W-MON', label='left', closed='left')
+    else:
+        bins = hist.resample('MS')
+    return bins.agg({k: f for k, f in OHLCV_AGG.items() if k in hist}).dropna(subset=['Close'])
+
+def fetch_history(ticker, period='4mo', interval='1d'):
+    """저장소에 있는 봉은 다시 받지 않고, 마지막 저장 봉 직전부터만 upstream 에서 받아 덧붙인다.
+    분봉은 upstream 보관 기간이 짧아 저장소에 쌓지 않고 매번 받는다."""
+    if not STORE_ENABLED or interval != '1d':
+        return provider.history(ticker, period=period, interval=interval)
+    bars, tz = price_store.load(ticker)
+    if len(bars) >= 2 and pd.Timestamp(bars['ts'][0], tz='UTC') <= period_start(period, tz) + pd.Timedelta(days=7):
+        # 직전 확정 봉부터 받아 겹치는 봉이 달라졌으면(배당·분할 수정주가) 저장된 첫 봉부터 다시 받아 파일을 통째로 바꾼다.
+        # 덧붙이기만 하면 그보다 앞선 봉은 수정 전 가격으로 남아 가짜 갭이 생긴다
+        since = pd.Timestamp(bars['ts'][-2], tz='UTC').tz_convert(tz)
+        fresh = provider.history(ticker, start=since.strftime('%Y-%m-%d'))
+        adjusted = not fresh.empty and fresh.index[0].value == bars['ts'][-2] and not np.isclose(fresh['Close'].iloc[0], bars['Close'][-2], rtol=1e-6)
+        if adjusted:
+            first = min(pd.Timestamp(bars['ts'][0], tz='UTC').tz_convert(tz), period_start(period, tz))
+            fresh = provider.history(ticker, start=first.strftime('%Y-%m-%d'))
+    else:
+        adjusted = False
+        fresh = provider.history(ticker, period=period)
+    if fresh.empty:
+        hist = price_store.frame(bars, tz) if len(bars) else fresh
+    else:
+        price_store.merge(ticker, fresh, replace=adjusted)
+        hist = price_store.frame(*price_store.load(ticker))
+    return hist[hist.index >= period_start(period, hist.index.tz).normalize()] if len(hist) else hist
+
+provider = ResilientProvider(InstrumentedProvider(make_provider()) if METRICS_ENABLED else make_provider())
+price_store = PriceStore(DATA_DIR)
+refresh_pool = ThreadPoolExecutor(max_workers=max(IO_WORKERS // 2, 1), thread_name_prefix='refresh') if STALE_TTL > 0 else None
+shared_cache = make_shared_cache(SHARED_CACHE)
+history_cache = TTLCache(CACHE_SIZE, STALE_TTL, refresh_pool, shared_cache, 'history')
+info_cache = TTLCache(CACHE_SIZE, STALE_TTL, refresh_pool, shared_cache, 'info')
+news_cache = TTLCache(CACHE_SIZE, STALE_TTL, refresh_pool, shared_cache, 'news')
+analysis_cache = TTLCache(CACHE_SIZE, 0, None, shared_cache, 'analysis')
+io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='upstream')
+batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+
+def get_history(ticker, period=DEFAULT_PERIOD, interval='1d'):
+    """period 차트와 지표 준비 구간을 덮는 interval 봉. 기본 봉 다운로드와 합친 결과를 따로 캐시한다."""
+    base, lookback = history_plan(period, interval)
+    ttl = market_ttl(ticker)
+    load_base = lambda: history_cache.get_or_load((ticker, lookback, base), lambda: fetch_history(ticker, lookback, base), ttl)
+    if interval == base:
+        return load_base()
+    return history_cache.get_or_load((ticker, lookback, base, interval), lambda: resample_bars(load_base(), interval, ticker), ttl)
+
+def get_info(ticker):
+    return info_cache.get_or_load(ticker, lambda: provider.info(ticker), market_ttl(ticker))
+
+def get_news_items(ticker):
+    return news_cache.get_or_load(ticker, lambda: provider.news(ticker), market_ttl(ticker))
+
+def fetch_concurrently(calls, timeouts=None, stale=None, pool=None):
+    """calls: {이름: 함수}. 모두 upstream 풀(pool, 기본 io_pool)에서 동시에 시작하고, 호출별 제한 시간 안에 끝난 결과와 실패 사유를 나눠 돌려준다.
+    stale 에 dict 를 주면 캐시의 만료된 값으로 답한 호출의 {이름: 값의 나이(초)} 를 채운다."""
+    start = time.monotonic()
+    durations = {}
+
+    def timed(name, fn):
+        t = time.perf_counter()
+        reset_stale()
+        try:
+            return fn()
+        finally:
+            durations[name] = time.perf_counter() - t
+            if stale is not None and stale_age() is not None:
+                stale[name] = round(stale_age(), 1)
+
+    futures = {name: (pool or io_pool).submit(timed, name, fn) for name, fn in calls.items()}
+    results, errors = {}, {}
+    for name, future in futures.items():
+        limit = (timeouts or {}).get(name, UPSTREAM_TIMEOUT)
+        try:
+            results[name] = future.result(timeout=max(start + limit - time.monotonic(), 0))
+        except FutureTimeout:
+            future.cancel()     # 아직 풀 대기열에 있으면 응답이 끝난 뒤에 upstream 을 부르지 않는다
+            errors[name] = f'응답 시간 초과 ({limit:g}초)'
+        except Exception as e:
+            errors[name] = str(e)
+        if name in durations:
+            record(f'fetch_{name}', durations[name])
+    if stale is not None:
+        for name in [n for n in stale if n not in results]:
+            del stale[name]
+    return results, errors
+
+def get_bulk_history(tickers, period='4mo'):
+    return history_cache.get_or_load(('bulk', tuple(tickers), period), lambda: provider.download(tickers, period), min(map(market_ttl, tickers)))
+
+def _source_hash():
+    with open(__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:8]
+
+BUILD_ID = _source_hash()   # 코드가 바뀌면 이전 ETag 는 모두 무효
+
+def analysis_etag(ticker, hist, info, *params):
+    """마지막 봉(시각·종가·거래량), 종가 열 전체의 해시, 요청 파라미터로 만든 ETag. 봉이 그대로면 분석 결과도 그대로라
+    다시 계산하지 않고 304 로 답한다. 수정주가로 과거 봉만 바뀌어도 종가 해시가 달라진다."""
+    if hist is None or hist.empty:
+        return None
+    last = hist.iloc[-1]
+    key = (BUILD_ID, ticker, len(hist), hist.index[-1].isoformat(), float(last['Close']), float(last['Volume']),
+           info.get('shortName', info.get('longName', '')), *params)
+    digest = hashlib.sha1(repr(key).encode())
+    digest.update(hist['Close'].to_numpy(dtype=float).tobytes())
+    return digest.hexdigest()[:20]
+
+def not_modified(tag):
+    """If-None-Match 가 tag 와 맞으면 304 응답, 아니면 None."""
+    if tag and request.if_none_match.contains_weak(tag):
+        return with_etag(Response(status=304), tag)
+    return None
+
+def with_etag(response, tag):
+    """약한 ETag 를 달고 매번 재검증하게 한다. 브라우저 fetch 가 알아서 If-None-Match 를 보낸다."""
+    if tag:
+        response.set_etag(tag, weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def not_found(tickers):
+    return [{'ticker': t, 'error': f"'{t}' 데이터를 찾을 수 없습니다."} for t in tickers]
+
+def wants_columnar():
+    return request.args.get('format') == 'columnar'
+
+def chart_params():
+    """period·interval·points 쿼리 파라미터. 지원하지 않는 조합이면 ValueError."""
+    period = request.args.get('period', DEFAULT_PERIOD)
+    interval = request.args.get('interval', '1d')
+    history_plan(period, interval)
+    points = min(max(request.args.get('points', CHART_POINTS, type=int), 10), CHART_POINTS_MAX)
+    return period, interval, points
+
+def request_tickers():
+    body = request.get_json(silent=True) or {}
+    raw = body.get('tickers') or request.args.get('tickers', '')
+    if isinstance(raw, str):
+        raw = raw.split(',')
+    return list(dict.fromkeys(t.strip().upper() for t in raw if t and t.strip()))
+
+def request_holdings():
+    """{티커: 비중}. JSON 본문의 holdings 객체, 또는 tickers 와 같은 순서의 weights (없으면 동일 비중).
+    같은 티커가 여러 번 오면 비중을 더한다. 비중 개수가 맞지 않거나 숫자가 아니면 ValueError."""
+    body = request.get_json(silent=True) or {}
+    if isinstance(body.get('holdings'), dict):
+        pairs = list(body['holdings'].items())
+    else:
+        raw = body.get('tickers') or request.args.get('tickers', '')
+        weights = body.get('weights') or request.args.get('weights', '')
+        if isinstance(raw, str):
+            raw = raw.split(',')
+        if isinstance(weights, str):
+            weights = weights.split(',')
+        raw = [t for t in raw if t and t.strip()]
+        weights = [w for w in weights if str(w).strip()]
+        if weights and len(weights) != len(raw):
+            raise ValueError(f'weights 개수({len(weights)})가 tickers 개수({len(raw)})와 다릅니다.')
+        pairs = zip(raw, weights or [1] * len(raw))
+    holdings = {}
+    for t, w in pairs:
+        t = t.strip().upper()
+        holdings[t] = holdings.get(t, 0.0) + float(w)
+    return holdings
+
+# 뉴스 감성 사전: 키워드 → 가중치 (양수 호재 / 음수 악재)
+NEWS_TERMS = {
+    **dict.fromkeys(['하락','손실','적자','위기','악재','소송','제재','리콜','경고','하향','매도','우려','둔화','감소','부진'], -1.0),
+    **dict.fromkeys(['상승','호재','실적','흑자','성장','신고가','매수','상향','확대','증가','호조','계약','협약','개발','출시'], 1.0),
+    **dict.fromkeys(['fall','drop','decline','loss','lawsuit','recall','warning','downgrade','sell','concern','slow','cut','weak'], -1.0),
+    **dict.fromkeys(['rise','gain','profit','growth','high','buy','upgrade','expand','record','deal','launch','beat'], 1.0),
+    '급락': -2.0, 'plunge': -2.0, '급등': 2.0, 'surge': 2.0, 'soar': 2.0,
+}
+NEGATORS_BEFORE = ['not', 'no', 'never', 'without', "n't"]   # 영어: 키워드 앞
+NEGATORS_AFTER = ['않', '없', '아니', '해소', '불식', '일축']     # 한국어: 키워드 뒤
+
+class SentimentLexicon:
+    """키워드와 부정어를 정규식 하나로 컴파일해 헤드라인을 한 번에 훑는다.
+    영어 키워드는 단어 시작에서만(대소문자 무시), 한국어 키워드는 어디서나 맞춘다.
+    영어 부정어가 키워드 앞 negate_window 글자 안에, 한국어 부정어가 키워드 뒤 negate_window 글자 안에 있으면 가중치 부호를 뒤집는다."""
+    def __init__(self, terms, before=NEGATORS_BEFORE, after=NEGATORS_AFTER, negate_window=12):
+        self.weights = {t.lower(): float(w) for t, w in terms.items()}
+        self.negate_window = negate_window
+        alt = lambda words: '|'.join((r'\b' if w.isascii() and w.isalpha() else '') + re.escape(w)
+                                     for w in sorted(words, key=len, reverse=True))
+        self.pattern = re.compile(f'(?P<before>(?:{alt(before)})\\b)|(?P<after>{alt(after)})|(?P<term>{alt(self.weights)})', re.IGNORECASE)
+
+    def score_many(self, titles):
+        """여러 헤드라인을 줄바꿈으로 이어 정규식 한 번으로 점수를 매긴다."""
+        titles = [t.replace('\n', ' ') for t in titles]
+        text = '\n'.join(titles)
+        ends = list(itertools.accumulate(len(t) + 1 for t in titles))
+        scores = [0.0] * len(titles)
+        row = 0
+        negate_at = last = None
+        for m in self.pattern.finditer(text):
+            while m.start() >= ends[row]:
+                row += 1
+                negate_at = last = None
+            kind = m.lastgroup
+            if kind == 'before':
+                negate_at = m.end()
+            elif kind == 'after':
+                if last is not None and m.start() - last[1] <= self.negate_window:
+                    scores[row] -= 2 * last[0]
+                    last = None
+            else:
+                w = self.weights[m.group().lower()]
+                if negate_at is not None and m.start() - negate_at <= self.negate_window:
+                    w, negate_at = -w, None
+                scores[row] += w
+                last = (w, m.end())
+        return scores
+
+    def score(self, title):
+        return self.score_many([title])[0]
+
+def load_lexicon():
+    terms = dict(NEWS_TERMS)
+    path = os.environ.get('STOCKSCAN_LEXICON')
+    if path:
+        with open(path, encoding='utf-8') as f:
+            terms.update(json.load(f))
+    return SentimentLexicon(terms)
+
+def sentiment_label(score):
+    return '호재' if score > 0 else '악재' if score < 0 else '중립'
+
+lexicon = load_lexicon()
+
+def news_rows(items, limit=8):
+    """upstream 뉴스 항목을 제목·링크·날짜·언론사 행으로. 감성 점수는 score_news 에서 붙인다."""
+    rows = []
+    for item in items[:limit]:
+        c = item.get('content', item)
+        title = c.get('title', '')
+        link = (c.get('canonicalUrl') or {}).get('url', '') or c.get('link', '')
+        pub_ts = c.get('pubDate', '') or c.get('providerPublishTime', 0)
+        publisher = (c.get('provider') or {}).get('displayName', '') or c.get('publisher', '')
+        try:
+            if isinstance(pub_ts, (int, float)) and pub_ts > 0:
+                date_str = datetime.datetime.fromtimestamp(pub_ts).strftime('%Y-%m-%d')
+            else:
+                date_str = str(pub_ts)[:10]
+        except:
+            date_str = ''
+        if title:
+            rows.append({'title': title, 'link': link, 'date': date_str, 'publisher': publisher})
+    return rows
+
+def score_news(rows):
+    for row, score in zip(rows, lexicon.score_many([r['title'] for r in rows])):
+        row['sentiment'] = sentiment_label(score)
+        row['score'] = score
+    return rows
+
+def build_news(items, limit=8):
+    return score_news(news_rows(items, limit))
+
+def build_analysis(ticker, hist, info, columnar=False, period=DEFAULT_PERIOD, interval='1d', points=CHART_POINTS):
+    """hist 는 get_history(ticker, period, interval) 결과. 지표는 준비 구간까지 포함한 전체 봉으로 계산하고,
+    차트는 마지막 봉 기준 period 구간만 보내되 points 개를 넘으면 LTTB 로 줄인다."""
+    if hist is not None and not hist.empty:
+        hist = hist[hist['Close'].notna()]     # 지표 엔진이 건너뛰는 봉은 차트에서도 빼야 배열이 맞는다
+    if hist is None or hist.empty or len(hist) < 30:
+        return {'error': f"'{ticker}' 데이터를 찾을 수 없습니다."}
+    intraday = INTERVAL_MINUTES[interval] < 1440
+    with span('indicators'):
+        _, lookback = history_plan(period, interval)
+        start = period_start(period, hist.index.tz, now=hist.index[-1] + pd.Timedelta(minutes=INTERVAL_MINUTES[interval]))
+        window = max(len(hist) - int(hist.index.searchsorted(start if intraday else start.normalize())), 2)
+        v, series = indicator_engine((ticker, interval, lookback), hist).snapshot(window)
+    hist = hist.tail(window)
+
+    is_kr = ticker.endswith('.KS') or ticker.endswith('.KQ')
+    price_fmt = f"{v['price']:,.0f}원" if is_kr else f"${v['price']:,.2f}"
+
+    with span('scoring'):
+        signals = rule_signals(v)
+        buy, sell = rule_scores(signals)
+        buy_score, sell_score = int(buy), int(sell)
+        indicators = describe_indicators(v, signals)
+        verdict = str(verdict_of(buy, sell))
+        confidence = float(confidence_of(buy, sell))
+        rsi_val, bb_pos, vol_ratio = v['rsi'], v['bb_pos'], v['vol_ratio']
+
+        v_color = {'매수':'<strong style="color:#00ff88">매수 신호</strong>','매도':'<strong style="color:#ff3b5c">매도 신호</strong>','관망':'<strong style="color:#ffb800">관망</strong>'}
+        summary = f"<strong>{ticker}</strong> 종목 분석 결과, 전반적으로 {v_color[verdict]}가 우세합니다 (매수 {buy_score}점 vs 매도 {sell_score}점). "
+        summary += f"RSI는 {rsi_val:.1f}로 {'과매도 구간, 반등 가능성.' if rsi_val<30 else '과매수 구간, 조정 가능성.' if rsi_val>70 else '중립 구간.'} "
+        summary += f"{'단기 이동평균이 중장기선을 상회, 상승 모멘텀.' if v['ma5']>v['ma20'] else '단기 이동평균이 중장기선을 하회, 하락 압력.'} "
+        summary += f"볼린저밴드 위치 {bb_pos:.0f}%, 거래량 평균 대비 {vol_ratio:.1f}배."
+
+    with span('chart'):
+        closes = hist['Close'].to_numpy(dtype=float)
+        keep = lttb_indices(closes, points) if len(closes) > points else slice(None)
+        index = hist.index[keep]
+        chart = {
+            'prices': safe_list(closes[keep]),
+            'ma5': safe_list(series['ma5'][keep]),
+            'ma20': safe_list(series['ma20'][keep]),
+            'bb_upper': safe_list(series['bb_upper'][keep]),
+            'bb_lower': safe_list(series['bb_lower'][keep]),
+        }
+        if columnar:
+            t = epoch_minutes(index) if intraday else epoch_days(index)
+            chart = {'chart': {'unit': 'minute' if intraday else 'day', 't0': int(t[0]), 't': (t - t[0]).tolist(), **chart}}
+        else:
+            chart = {'dates': index.strftime('%Y-%m-%d %H:%M' if intraday else '%Y-%m-%d').tolist(), **chart}
+
+    return {
+        'ticker': ticker,
+        'name': info.get('shortName', info.get('longName', '')),
+        'price_fmt': price_fmt,
+        'price_change': v['price_change'],
+        'verdict': verdict,
+        'buy_score': buy_score,
+        'sell_score': sell_score,
+        'confidence': confidence,
+        'indicators': indicators,
+        'summary': summary,
+        'period': period,
+        'interval': interval,
+        'bars': int(window),
+        **chart,
+    }
+
+def fetch_report(ticker, period=DEFAULT_PERIOD, interval='1d'):
+    """build_report 의 upstream 단계. 시세·종목정보·뉴스를 병렬로 받아 (결과, 실패 사유, stale 나이)."""
+    stale = {}
+    results, errors = fetch_concurrently({
+        'history': lambda: get_history(ticker, period, interval),
+        'info': lambda: get_info(ticker),
+        'news': lambda: get_news_items(ticker),
+    }, stale=stale)
+    return results, errors, stale
+
+def report_etag(ticker, results, *params):
+    """analysis_etag 에 받은 뉴스 목록을 더한 ETag. 시세를 못 받았으면 None."""
+    if 'history' not in results:
+        return None
+    tag = analysis_etag(ticker, results['history'], results.get('info') or {}, *params)
+    return tag and hashlib.sha1(repr((tag, results.get('news'))).encode()).hexdigest()[:20]
+
+def build_report(ticker, columnar=False, period=DEFAULT_PERIOD, interval='1d', points=CHART_POINTS, fetched=None):
+    """분석 + 뉴스. upstream 호출은 병렬로 하고 일부가 실패하면 'partial' 에 사유를, 만료된 캐시 값으로 답했으면 'stale' 에 그 나이(초)를 담는다.
+    fetched 는 이미 받아 둔 fetch_report 결과."""
+    try:
+        results, errors, stale = fetched or fetch_report(ticker, period, interval)
+        if 'history' in errors:
+            data = {'error': f"분석 중 오류 발생: {errors['history']}"}
+        else:
+            data = build_analysis(ticker, results['history'], results.get('info') or {}, columnar, period, interval, points)
+        with span('sentiment'):
+            data['news'] = build_news(results.get('news') or [])
+        if errors:
+            data['partial'] = errors
+        if stale:
+            data['stale'] = stale
+        return data
+    except Exception as e:
+        return {'error': f'분석 중 오류 발생: {str(e)}', 'news': []}
+
+SERIES_FIELDS = ('dates', 'prices', 'ma5', 'ma20', 'bb_upper', 'bb_lower')
+
+def diff_analysis(prev, cur):
+    """prev 대비 바뀐 필드만 담은 patch. 차트 배열은 앞에서 밀려난 봉 수(shift)와
+    처음 달라진 위치(start)부터의 값만 보낸다. 클라이언트: arr.slice(shift).slice(0, start).concat(values)"""
+    patch = {k: v for k, v in cur.items() if k not in SERIES_FIELDS and prev.get(k) != v}
+    removed = [k for k in prev if k not in cur]
+    if removed:
+        patch['removed'] = removed
+    if not all(k in cur for k in SERIES_FIELDS):
+        return patch
+    old_dates, new_dates = prev.get('dates') or [], cur['dates']
+    shift = old_dates.index(new_dates[0]) if new_dates and new_dates[0] in old_dates else None
+    if shift is None or not all(k in prev for k in SERIES_FIELDS):
+        patch['series'] = {'shift': len(old_dates), 'start': 0, 'values': {k: cur[k] for k in SERIES_FIELDS}}
+        return patch
+    kept = min(len(old_dates) - shift, len(new_dates))
+    start = next((j for j in range(kept) if any(prev[k][shift + j] != cur[k][j] for k in SERIES_FIELDS)), kept)
+    if start < len(new_dates) or len(old_dates) - shift != len(new_dates):
+        patch['series'] = {'shift': shift, 'start': start, 'values': {k: cur[k][start:] for k in SERIES_FIELDS}}
+    return patch
+
+class TickerFeed:
+    """종목 하나의 실시간 갱신. 구독자가 있는 동안 백그라운드 스레드 하나가 interval 마다 리포트를 계산하고
+    처음에는 전체(snapshot), 이후에는 바뀐 부분(patch)만 모든 구독자 큐에 넣는다. chart 는 build_report 의 (period, interval, points)."""
+    def __init__(self, ticker, interval, chart=()):
+        self.ticker, self.interval, self.chart = ticker, interval, chart
+        self.subscribers = set()
+        self.latest = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        with self.lock:
+            self.subscribers.add(q)
+            if self.latest is not None:
+                q.put(('snapshot', self.latest))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name=f'feed-{self.ticker}', daemon=True)
+                self.thread.start()
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            self.subscribers.discard(q)
+
+    def _publish(self, kind, payload):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait((kind, payload))
+            except queue.Full:
+                # 밀린 구독자는 쌓인 patch 를 버리고 최신 전체로 다시 맞춘다
+                while not q.empty():
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        break
+                q.put_nowait(('snapshot', self.latest))
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if not self.subscribers:
+                    self.thread = None
+                    return
+            data = build_report(self.ticker, False, *self.chart)
+            prev, self.latest = self.latest, data
+            if prev is None:
+                self._publish('snapshot', data)
+            else:
+                patch = diff_analysis(prev, data)
+                if patch:
+                    self._publish('patch', patch)
+            time.sleep(self.interval)
+
+class FeedRegistry:
+    def __init__(self, interval):
+        self.interval = interval
+        self.feeds = {}
+        self.lock = threading.Lock()
+
+    def get(self, ticker, chart=()):
+        with self.lock:
+            for k in [k for k, f in self.feeds.items() if not f.subscribers and f.thread is None]:
+                del self.feeds[k]
+            feed = self.feeds.get((ticker, chart))
+            if feed is None:
+                feed = self.feeds[(ticker, chart)] = TickerFeed(ticker, self.interval, chart)
+            return feed
+
+feeds = FeedRegistry(STREAM_INTERVAL)
+
+SCREEN_FIELDS = ('price', 'price_change', 'rsi', 'macd', 'macd_hist', 'bb_pos', 'ma5', 'ma20', 'ma60', 'vol_ratio',
+                 'dist_sup', 'dist_res', 'buy_score', 'sell_score', 'score', 'confidence')
+SCREEN_INDEXED = ('price_change', 'rsi', 'bb_pos', 'vol_ratio', 'dist_sup', 'dist_res', 'score', 'confidence')
+SCREEN_OPS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge, '=': operator.eq}   # 배열·스칼라 모두
+SCREEN_CONDITION = re.compile(r'\s*(\w+)\s*(<=|>=|==|=|<|>)\s*(-?\d+(?:\.\d*)?)\s*')
+CONDITION_SEPARATOR = re.compile(r',|\band\b|&&', re.IGNORECASE)
+
+def parse_conditions(text):
+    """'rsi<30, vol_ratio>1.5' 또는 'rsi < 30 and vol_ratio > 1.5' → [(필드, 연산자, 값), ...]. 필드는 SCREEN_FIELDS."""
+    conditions = []
+    for clause in CONDITION_SEPARATOR.split(text):
+        if not clause.strip():
+            continue
+        m = SCREEN_CONDITION.fullmatch(clause)
+        if not m or m.group(1) not in SCREEN_FIELDS:
+            raise ValueError(f'잘못된 조건: {clause.strip()} (필드: {", ".join(SCREEN_FIELDS)})')
+        conditions.append((m.group(1), m.group(2).replace('==', '='), float(m.group(3))))
+    return conditions
+
+class ScreenTable:
+    """종목당 한 행인 지표 표. 열은 numpy 배열이고, SCREEN_INDEXED 열은 정렬 순서를 미리 만들어 두어
+    범위 조건과 정렬을 이진 탐색·순위 비교로 푼다. 만든 뒤에는 바꾸지 않고 새 표로 통째로 바꿔 끼운다."""
+    def __init__(self, tickers, cols, as_of):
+        self.tickers, self.cols, self.as_of = np.array(tickers), cols, as_of
+        self.n = len(tickers)
+        self.groups = {}
+        for i, t in enumerate(tickers):
+            self.groups.setdefault(('market', market_of(t)), []).append(i)
+            self.groups.setdefault(('exchange', t.rpartition('.')[2] if '.' in t else 'US'), []).append(i)
+        self.groups = {k: np.array(rows) for k, rows in self.groups.items()}
+        self.order, self.sorted, self.rank, self.valid = {}, {}, {}, {}
+        for k in SCREEN_INDEXED:
+            order = np.argsort(cols[k], kind='stable')   # NaN 은 맨 뒤
+            self.order[k], self.sorted[k] = order, cols[k][order]
+            self.valid[k] = int((~np.isnan(cols[k])).sum())
+            self.rank[k] = np.empty(self.n, dtype=np.int64)
+            self.rank[k][order] = np.arange(self.n)
+
+    def rows_where(self, field, op, value):
+        """field op value 를 만족하는 행 번호."""
+        if field not in self.order:
+            with np.errstate(invalid='ignore'):
+                return np.flatnonzero(SCREEN_OPS[op](self.cols[field], value))
+        s = self.sorted[field][:self.valid[field]]
+        left, right = int(np.searchsorted(s, value, 'left')), int(np.searchsorted(s, value, 'right'))
+        lo, hi = {'<': (0, left), '<=': (0, right), '>': (right, len(s)), '>=': (left, len(s)), '=': (left, right)}[op]
+        return self.order[field][lo:hi]
+
+    def query(self, conditions=(), groups=(), sort=None, descending=False):
+        """조건을 모두 만족하는 행 번호를 sort 열 순서로. NaN 은 방향과 상관없이 맨 뒤."""
+        mask = None
+        for rows in [self.rows_where(*c) for c in conditions] + [self.groups.get(g, np.empty(0, dtype=int)) for g in groups]:
+            m = np.zeros(self.n, dtype=bool)
+            m[rows] = True
+            mask = m if mask is None else mask & m
+        rows = np.arange(self.n) if mask is None else np.flatnonzero(mask)
+        if sort is None:
+            return rows
+        if sort in self.rank:
+            key = self.rank[sort][rows]
+            if descending:
+                key = np.where(key < self.valid[sort], -key, key)
+        else:
+            a = self.cols[sort][rows]
+            key = np.where(np.isnan(a), np.inf, -a if descending else a)
+        return rows[np.argsort(key, kind='stable')]
+
+    def records(self, rows):
+        cols = {k: safe_list(self.cols[k][rows]) for k in SCREEN_FIELDS}
+        verdicts = verdict_label(self.cols['verdict'][rows])
+        return [{'ticker': str(t), 'verdict': str(verdicts[j]), **{k: cols[k][j] for k in SCREEN_FIELDS}}
+                for j, t in enumerate(self.tickers[rows])]
+
+def load_universe(spec):
+    """쉼표로 구분한 티커 목록 또는 한 줄에 티커 하나인 파일 경로."""
+    if spec and os.path.exists(spec):
+        with open(spec, encoding='utf-8') as f:
+            spec = f.read().replace('\n', ',')
+    return list(dict.fromkeys(t.strip().upper() for t in spec.split(',') if t.strip()))
+
+def bulk_stamps(index, market):
+    """get_bulk_history 인덱스를 get_history 와 같은 ns 시각으로. 날짜만 있으면(yf.download 일봉) 그 시장의 현지 자정이다."""
+    if index.tz is None:
+        index = index.tz_localize(MARKETS[market][0])
+    return index.as_unit('ns').asi8
+
+def bulk_snapshots(data, tickers, lookback, min_bars=30):
+    """get_bulk_history(tickers, lookback) 결과의 종목마다 /analyze 와 같은 키의 IncrementalIndicators 를 갱신해
+    최신 지표값을 얻는다. /analyze·/scan·/screen·/portfolio 가 같은 봉에 같은 값을 낸다. 봉이 min_bars 보다 적은 종목은 뺀다.
+    (계산한 종목, 종목별 지표 dict)."""
+    closes = data['Close'].reindex(columns=tickers).to_numpy(dtype=float)
+    volumes = np.nan_to_num(data['Volume'].reindex(columns=tickers).to_numpy(dtype=float))
+    stamps, done, rows = {}, [], []
+    for j, t in enumerate(tickers):
+        ok = ~np.isnan(closes[:, j])
+        if ok.sum() < min_bars:
+            continue
+        market = market_of(t)
+        if market not in stamps:
+            stamps[market] = bulk_stamps(data.index, market)
+        engine = engine_for((t, '1d', lookback)).update_arrays(stamps[market][ok], closes[ok, j], volumes[ok, j])
+        done.append(t)
+        rows.append(engine.snapshot(1)[0])
+    return done, rows
+
+def snapshot_columns(rows):
+    """종목별 지표 dict 목록 → {지표: 종목 순서의 배열} (indicator_snapshot 의 DataFrame 결과와 같은 모양)."""
+    return {k: np.array([r[k] for r in rows], dtype=float) for k in rows[0]}
+
+class Screener:
+    """universe 종목의 지표를 interval 초마다 백그라운드에서 다시 계산해 ScreenTable 을 바꿔 끼운다.
+    봉은 묶음으로 받되 /analyze 와 같은 준비 구간을 받아 같은 키의 IncrementalIndicators 로 계산하므로 두 결과가 같다.
+    /screen 은 upstream 을 부르지 않고 마지막 표만 읽는다. 표를 바꿀 때마다 listeners 를 (이전 표, 새 표) 로 부른다.
+    shared(SharedCache) 가 있으면 워커 중 lease 를 잡은 하나만 계산하고 listeners 를 부르며, 표를 shared 에 올린다.
+    나머지 워커는 그 표를 받아 쓰기만 한다. lease 를 잡은 워커가 죽으면 lease 가 끝난 뒤 다른 워커가 이어받는다."""
+    LEADER_KEY, TABLE_KEY = 'screener:leader', 'screener:table'
+    FOLLOW_EVERY = 5
+    LEASE = 30      # 맡은 워커는 FOLLOW_EVERY 초마다 연장한다. 죽으면 이만큼 뒤 다른 워커가 이어받는다
+
+    def __init__(self, universe, interval, shared=None):
+        self.universe, self.interval, self.shared = universe, interval, shared
+        self.table = None
+        self.listeners = []
+        self.watchers = []      # 함께 계산할 종목을 돌려주는 함수들 (알림 규칙의 종목 등)
+        self.leader = False
+        self.thread = None
+        self.last_error = None
+        self.lock = threading.Lock()
+
+    def tickers(self):
+        return list(dict.fromkeys(self.universe + [t for watcher in self.watchers for t in watcher()]))
+
+    def start(self):
+        with self.lock:
+            if self.thread is None and self.tickers():
+                self.thread = threading.Thread(target=self._run, name='screener', daemon=True)
+                self.thread.start()
+
+    def refresh(self):
+        _, lookback = history_plan(DEFAULT_PERIOD, '1d')
+        universe = self.tickers()
+        reserve_engines(len(universe))
+        tickers, rows, errors = [], [], []
+        for i in range(0, len(universe), SCREEN_CHUNK):
+            if i and not self.lead():
+                return      # 갱신이 lease 보다 오래 걸려 다른 워커가 넘겨받았다
+            chunk = universe[i:i + SCREEN_CHUNK]
+            try:
+                data = get_bulk_history(chunk, lookback)
+            except Exception as e:
+                errors.append(str(e))
+                continue
+            if data.empty:
+                continue
+            done, snaps = bulk_snapshots(data, chunk, lookback)
+            tickers += done
+            rows += snaps
+        self.last_error = '; '.join(errors) or None
+        if not rows:
+            return
+        v = snapshot_columns(rows)
+        buy, sell = rule_scores(rule_signals(v))
+        cols = dict(v)
+        cols.update(buy_score=buy.astype(float), sell_score=sell.astype(float), score=(buy - sell).astype(float),
+                    confidence=np.asarray(confidence_of(buy, sell), dtype=float), verdict=verdict_code(buy, sell))
+        prev, self.table = self.table, ScreenTable(tickers, cols, time.time())
+        for listener in self.listeners:
+            listener(prev, self.table)
+        if self.shared is not None:
+            now = time.time()
+            self.shared.set(self.TABLE_KEY, self.table, now + self.interval * 3, now + self.interval * 3)
+
+    def lead(self):
+        """이 워커가 계산을 맡으면 True. 맡고 있던 워커는 부를 때마다 lease 를 연장한다."""
+        if self.shared is not None:
+            self.leader = self.shared.acquire(self.LEADER_KEY, lease=self.LEASE)
+        else:
+            self.leader = True
+        return self.leader
+
+    def follow(self):
+        """계산을 맡은 워커가 올린 표가 더 새것이면 바꿔 끼운다."""
+        row = self.shared.get(self.TABLE_KEY)
+        if row is not None and (self.table is None or row[0].as_of > self.table.as_of):
+            self.table = row[0]
+
+    def _run(self):
+        while True:
+            try:
+                if self.lead():
+                    with span('screen_refresh'):
+                        self.refresh()
+                else:
+                    self.follow()
+            except Exception as e:
+                self.last_error = str(e)
+            if not self.leader:
+                time.sleep(min(self.interval, self.FOLLOW_EVERY))
+                continue
+            # 다음 갱신까지 쉬는 동안에도 lease 를 연장한다. 놓쳤으면 바로 따라가는 쪽으로 돌아간다
+            deadline = time.monotonic() + self.interval
+            while time.monotonic() < deadline and self.lead():
+                time.sleep(max(min(deadline - time.monotonic(), self.FOLLOW_EVERY), 0))
+
+screener = Screener(load_universe(SCREEN_UNIVERSE), SCREEN_INTERVAL, shared_cache)
+
+def _expand_ranges(starts, ends):
+    """[starts[i], ends[i]) 구간들을 펼친 (구간 번호, 위치) 배열."""
+    lengths = np.maximum(ends - starts, 0)
+    owner = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owner, starts[owner] + offsets
+
+def _satisfied_range(thresholds, op, x):
+    """정렬된 thresholds 중 'x op 임계값' 을 만족하는 것은 연속 구간 [lo, hi) 이다. x 가 NaN 이면 빈 구간."""
+    n = len(thresholds)
+    left, right = np.searchsorted(thresholds, x, 'left'), np.searchsorted(thresholds, x, 'right')
+    lo, hi = {'<': (right, n), '<=': (left, n), '>': (0, left), '>=': (0, right), '=': (left, right)}[op]
+    nan = np.isnan(x)
+    return np.where(nan, 0, lo), np.where(nan, 0, np.broadcast_to(hi, x.shape))
+
+class AlertEngine:
+    """조건 규칙을 지표 표가 바뀔 때마다 평가해 거짓 → 참으로 바뀐 순간에만 알림을 낸다.
+    규칙은 추가·삭제 때 한 번 컴파일해 필드·연산자별로 묶는다. 모든 종목 대상 규칙은 임계값을 정렬해 두어
+    값이 바뀐 종목마다 이분 탐색 두 번으로 (이전 값, 새 값) 사이에 든 임계값, 즉 새로 참이 된 조건만 꺼내고,
+    종목을 지정한 규칙은 그 종목 값이 바뀐 것만 배열 연산으로 비교한다. 조건이 여럿인 규칙은 그렇게 뽑힌 후보만 나머지 조건을 확인한다.
+    처음 보는 표와 새로 들어온 종목은 기준값으로만 쓰고 알림을 내지 않는다.
+    규칙은 path 파일이 원본이다. 워커마다 파일이 바뀌었으면(mtime) 다시 읽고, 추가·삭제는 파일 잠금 안에서 읽고 고쳐 쓴다.
+    shared 가 있으면 최근 알림도 그곳에 올려 평가를 맡지 않은 워커의 /alerts 도 같은 목록을 본다."""
+    RECENT_KEY = 'alerts:recent'
+
+    def __init__(self, path=None, sinks=(), history=ALERT_HISTORY, shared=None):
+        self.path, self.sinks, self.shared = path, list(sinks), shared
+        self.rules = OrderedDict()
+        self.recent = deque(maxlen=history)
+        self.lock = threading.Lock()
+        self._stamp = None
+        self._compiled = None
+        self._dispatch = ThreadPoolExecutor(max_workers=1, thread_name_prefix='alerts')
+        self.sync()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _locked(self):
+        if not self.path:
+            return contextlib.nullcontext()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        f = open(self.path + '.lock', 'a')
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        return f
+
+    def _read(self):
+        """파일의 규칙으로 바꿔 끼운다. self.lock 안에서 부른다."""
+        stamp = self._file_stamp()
+        rules = OrderedDict()
+        if stamp is not None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    items = json.load(f)
+            except (OSError, ValueError) as e:
+                # 손으로 고치다 깨진 파일 때문에 스크리너 갱신까지 멈추지 않게, 알리고 규칙 없이 간다
+                metrics.inc('stockscan_alert_rules_errors_total')
+                print(f'알림 규칙 파일을 읽지 못해 규칙 없이 진행합니다: {self.path}: {e}', file=sys.stderr)
+                items = []
+            for rule in items if isinstance(items, list) else []:
+                try:
+                    rules[str(rule['id'])] = (rule, parse_conditions(rule['when']))
+                except (KeyError, TypeError, ValueError):
+                    continue
+        self.rules, self._stamp, self._compiled = rules, stamp, None
+
+    def sync(self):
+        """다른 워커가 규칙 파일을 바꿨으면 다시 읽는다."""
+        if self.path and self._file_stamp() != self._stamp:
+            with self.lock:
+                self._read()
+
+    def add(self, ticker, when, name=None):
+        """ticker 가 없거나 '*' 면 universe 의 모든 종목. 조건이 잘못됐으면 ValueError."""
+        conditions = parse_conditions(when)
+        if not conditions:
+            raise ValueError('조건을 입력해주세요.')
+        ticker = (ticker or '*').strip().upper()
+        with self._locked(), self.lock:
+            if self.path:
+                self._read()
+            rule_id = str(max((int(i) for i in self.rules if i.isdigit()), default=0) + 1)
+            rule = {'id': rule_id, 'name': name or when, 'ticker': ticker, 'when': when}
+            self.rules[rule_id] = (rule, conditions)
+            self._compiled = None
+            self._save()
+        return rule
+
+    def remove(self, rule_id):
+        with self._locked(), self.lock:
+            if self.path:
+                self._read()
+            found = self.rules.pop(rule_id, None) is not None
+            if found:
+                self._compiled = None
+                self._save()
+        return found
+
+    def rule_list(self):
+        self.sync()
+        with self.lock:
+            return [rule for rule, _ in self.rules.values()]
+
+    def tickers(self):
+        """종목을 지정한 규칙의 종목. 스크리너가 universe 에 없어도 함께 계산한다."""
+        self.sync()
+        with self.lock:
+            return [rule['ticker'] for rule, _ in self.rules.values() if rule['ticker'] != '*']
+
+    def recent_alerts(self):
+        if self.shared is not None:
+            row = self.shared.get(self.RECENT_KEY)
+            if row is not None:
+                return row[0]
+        return list(self.recent)
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump([rule for rule, _ in self.rules.values()], f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+        self._stamp = self._file_stamp()
+
+    def _compile(self):
+        """(필드, 연산자) → 임계값 순으로 정렬한 (임계값, 규칙 번호) 와 필드 → 종목 지정 조건 배열."""
+        rules = list(self.rules.values())
+        shared, specific = {}, {}
+        for r, (rule, conditions) in enumerate(rules):
+            for field, op, value in conditions:
+                if rule['ticker'] == '*':
+                    shared.setdefault((field, op), []).append((value, r))
+                else:
+                    specific.setdefault(field, []).append((rule['ticker'], op, value, r))
+        for key, items in shared.items():
+            items.sort()
+            shared[key] = (np.array([v for v, _ in items]), np.array([r for _, r in items], dtype=np.int64))
+        for field, items in specific.items():
+            tickers, ops, values, owners = zip(*items)
+            specific[field] = (pd.Index(tickers), np.array(ops), np.array(values), np.array(owners, dtype=np.int64))
+        return rules, shared, specific
+
+    def evaluate(self, prev, table):
+        """prev → table 사이에 새로 참이 된 규칙의 알림 목록. sinks 로는 따로 보낸다."""
+        if prev is None or not table.n:
+            return []
+        self.sync()
+        with self.lock:
+            if self._compiled is None:
+                self._compiled = self._compile()
+            rules, shared, specific = self._compiled
+        if not rules:
+            return []
+        index = pd.Index(table.tickers)
+        before = pd.Index(prev.tickers).get_indexer(index)
+        seen = before >= 0
+        candidates = set()
+        for field in {f for f, _ in shared} | set(specific):
+            new = table.cols[field]
+            old = np.where(seen, prev.cols[field][before], np.nan)
+            changed = np.flatnonzero(seen & (old != new) & ~(np.isnan(old) & np.isnan(new)))
+            if not len(changed):
+                continue
+            for (f, op), (thresholds, owners) in shared.items():
+                if f != field:
+                    continue
+                lo_new, hi_new = _satisfied_range(thresholds, op, new[changed])
+                lo_old, hi_old = _satisfied_range(thresholds, op, old[changed])
+                # 새 구간에서 옛 구간을 뺀 나머지. 연산자마다 구간이 한쪽 끝에 붙어 있어 많아야 한 조각이다
+                cut = np.maximum(np.minimum(hi_new, lo_old), lo_new)
+                for starts, ends in ((lo_new, cut), (np.maximum(np.maximum(lo_new, hi_old), cut), hi_new)):
+                    row, pos = _expand_ranges(starts, ends)
+                    candidates.update(zip(owners[pos].tolist(), changed[row].tolist()))
+            if field in specific:
+                tickers, ops, values, owners = specific[field]
+                rows = index.get_indexer(tickers)
+                ok = np.isin(rows, changed)
+                hit = np.zeros(len(rows), dtype=bool)
+                with np.errstate(invalid='ignore'):
+                    for op, fn in SCREEN_OPS.items():
+                        m = ok & (ops == op)
+                        hit[m] = fn(new[rows[m]], values[m]) & ~fn(old[rows[m]], values[m])
+                candidates.update(zip(owners[hit].tolist(), rows[hit].tolist()))
+        alerts = []
+        fields = {f for r, _ in candidates for f, _, _ in rules[r][1]}
+        raw = {f: table.cols[f].tolist() for f in fields}
+        shown = {f: safe_list(table.cols[f]) for f in fields}
+        tickers = table.tickers.tolist()
+        for r, i in sorted(candidates):
+            rule, conditions = rules[r]
+            if len(conditions) > 1 and not all(SCREEN_OPS[op](raw[f][i], v) for f, op, v in conditions):
+                continue
+            alerts.append({**rule, 'ticker': tickers[i], 'time': int(table.as_of),
+                           'values': {f: shown[f][i] for f, _, _ in conditions}})
+        if alerts:
+            metrics.inc('stockscan_alerts_total', len(alerts))
+            self.recent.extend(alerts)
+            if self.shared is not None:
+                keep = time.time() + 7 * 86400
+                self.shared.set(self.RECENT_KEY, list(self.recent), keep, keep)
+            self._dispatch.submit(self._send, alerts)
+        return alerts
+
+    def _send(self, alerts):
+        for sink in self.sinks:
+            try:
+                sink(alerts)
+            except Exception:
+                metrics.inc('stockscan_alert_sink_errors_total', sink=getattr(sink, 'name', 'sink'))
+
+def log_sink(path):
+    """알림 하나를 JSON 한 줄로 path 에 덧붙인다. '-' 면 stderr."""
+    def send(alerts):
+        lines = ''.join(json.dumps(a, ensure_ascii=False) + '\n' for a in alerts)
+        if path == '-':
+            sys.stderr.write(lines)
+            sys.stderr.flush()
+        else:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+    send.name = 'log'
+    return send
+
+def webhook_sink(url, timeout=5):
+    """한 번 갱신에서 나온 알림을 {"alerts": [...]} JSON 으로 url 에 POST 한다."""
+    def send(alerts):
+        body = json.dumps({'alerts': alerts}, ensure_ascii=False).encode()
+        req = urllib.request.Request(url, body, {'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            r.read()
+    send.name = 'webhook'
+    return send
+
+alerts = AlertEngine(ALERT_RULES if ALERT_RULES != '0' else None,
+                     [log_sink(ALERT_LOG)] + ([webhook_sink(ALERT_WEBHOOK)] if ALERT_WEBHOOK else []), shared=shared_cache)
+screener.listeners.append(alerts.evaluate)
+screener.watchers.append(alerts.tickers)
+
 @app.route('/')
 def index():
-    return HTML
+    return INDEX.response('no-cache')
+
+@app.route('/static/<name>')
+def static_asset(name):
+    """내용 해시가 붙은 URL 은 바뀌지 않으므로 1년 캐시, 해시 없는 이름은 매번 재검증."""
+    if name in VERSIONED_ASSETS:
+        return VERSIONED_ASSETS[name].response('public, max-age=31536000, immutable')
+    if name in STATIC_ASSETS:
+        return STATIC_ASSETS[name].response('no-cache')
+    return Response('not found', status=404, mimetype='text/plain')
 
 @app.route('/analyze')
 def analyze():
@@ -387,103 +2858,379 @@ def analyze():
     if not ticker:
         return jsonify({'error': '티커를 입력해주세요.'})
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period='4mo')
-        if hist.empty or len(hist) < 30:
-            return jsonify({'error': f"'{ticker}' 데이터를 찾을 수 없습니다."})
-
-        hist = hist.tail(60)
-        closes = hist['Close']
-        info = stock.info
-
-        current = float(closes.iloc[-1])
-        prev = float(closes.iloc[-2])
-        price_change = (current - prev) / prev * 100
-        is_kr = ticker.endswith('.KS') or ticker.endswith('.KQ')
-        price_fmt = f"{current:,.0f}원" if is_kr else f"${current:,.2f}"
-
-        rsi = calc_rsi(closes)
-        rsi_val = float(rsi.iloc[-1])
-        macd_line, _, macd_hist = calc_macd(closes)
-        macd_val = float(macd_line.iloc[-1])
-        hist_val = float(macd_hist.iloc[-1])
-        bb_upper, _, bb_lower = calc_bollinger(closes)
-        bb_u = float(bb_upper.iloc[-1])
-        bb_l = float(bb_lower.iloc[-1])
-        bb_pos = (current - bb_l) / (bb_u - bb_l) * 100 if (bb_u - bb_l) > 0 else 50
-        ma5 = closes.rolling(5).mean()
-        ma20 = closes.rolling(20).mean()
-        ma60 = closes.rolling(60).mean()
-        ma5_val = float(ma5.iloc[-1])
-        ma20_val = float(ma20.iloc[-1])
-        ma60_val = float(ma60.iloc[-1]) if len(closes) >= 60 else float(ma20.iloc[-1])
-        vol = float(hist['Volume'].iloc[-1])
-        avg_vol = float(hist['Volume'].mean())
-        vol_ratio = vol / avg_vol if avg_vol > 0 else 1
-        support = float(closes.tail(20).min())
-        resistance = float(closes.tail(20).max())
-        dist_sup = (current - support) / support * 100
-        dist_res = (resistance - current) / resistance * 100
-
-        buy_score = 0; sell_score = 0; indicators = []
-
-        if rsi_val < 30: buy_score += 2; indicators.append({'name':'RSI','verdict':'매수','detail':f'{rsi_val:.1f} — 과매도'})
-        elif rsi_val > 70: sell_score += 2; indicators.append({'name':'RSI','verdict':'매도','detail':f'{rsi_val:.1f} — 과매수'})
-        else: indicators.append({'name':'RSI','verdict':'중립','detail':f'{rsi_val:.1f} — 중립'})
-
-        if ma5_val > ma20_val and ma20_val > ma60_val: buy_score += 2; indicators.append({'name':'이동평균','verdict':'매수','detail':'골든크로스 ▲'})
-        elif ma5_val < ma20_val and ma20_val < ma60_val: sell_score += 2; indicators.append({'name':'이동평균','verdict':'매도','detail':'데드크로스 ▼'})
-        else: indicators.append({'name':'이동평균','verdict':'중립','detail':'혼재 신호'})
-
-        if bb_pos < 15: buy_score += 1; indicators.append({'name':'볼린저밴드','verdict':'매수','detail':f'하단 근접 ({bb_pos:.0f}%)'})
-        elif bb_pos > 85: sell_score += 1; indicators.append({'name':'볼린저밴드','verdict':'매도','detail':f'상단 근접 ({bb_pos:.0f}%)'})
-        else: indicators.append({'name':'볼린저밴드','verdict':'중립','detail':f'중간 ({bb_pos:.0f}%)'})
-
-        if hist_val > 0 and macd_val > 0: buy_score += 1; indicators.append({'name':'MACD','verdict':'매수','detail':'히스토그램 양전환'})
-        elif hist_val < 0 and macd_val < 0: sell_score += 1; indicators.append({'name':'MACD','verdict':'매도','detail':'히스토그램 음전환'})
-        else: indicators.append({'name':'MACD','verdict':'중립','detail':'전환점 관찰 중'})
-
-        if vol_ratio > 1.5:
-            if price_change > 0: buy_score += 1; indicators.append({'name':'거래량','verdict':'매수','detail':f'급증+상승 ({vol_ratio:.1f}x)'})
-            else: sell_score += 1; indicators.append({'name':'거래량','verdict':'매도','detail':f'급증+하락 ({vol_ratio:.1f}x)'})
-        else: indicators.append({'name':'거래량','verdict':'중립','detail':f'평균 수준 ({vol_ratio:.1f}x)'})
-
-        if dist_sup < 3: buy_score += 1; indicators.append({'name':'지지/저항','verdict':'매수','detail':f'지지선 근접 (+{dist_sup:.1f}%)'})
-        elif dist_res < 3: sell_score += 1; indicators.append({'name':'지지/저항','verdict':'매도','detail':f'저항선 근접 (-{dist_res:.1f}%)'})
-        else: indicators.append({'name':'지지/저항','verdict':'중립','detail':f'지지 +{dist_sup:.1f}% / 저항 -{dist_res:.1f}%'})
-
-        verdict = '매수' if buy_score > sell_score + 1 else '매도' if sell_score > buy_score + 1 else '관망'
-        confidence = max(buy_score, sell_score) / (buy_score + sell_score + 2) * 100
+        period, interval, points = chart_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)})
+    try:
+        stale = {}
+        results, errors = fetch_concurrently({'history': lambda: get_history(ticker, period, interval), 'info': lambda: get_info(ticker)}, stale=stale)
+        if 'history' in errors:
+            return jsonify({'error': f"분석 중 오류 발생: {errors['history']}"})
+        info = results.get('info') or {}
+        tag = analysis_etag(ticker, results['history'], info, period, interval, points, wants_columnar())
+        cached = not_modified(tag)
+        if cached is not None:
+            return cached
+        build = lambda: build_analysis(ticker, results['history'], info, wants_columnar(), period, interval, points)
+        data = dict(analysis_cache.get_or_load(tag, build, market_ttl(ticker)) if tag else build())
+        if stale:
+            data['stale'] = stale
+        with span('serialize'):
+            return with_etag(jsonify(data), tag if 'error' not in data else None)
+    except Exception as e:
+        return jsonify({'error': f'분석 중 오류 발생: {str(e)}'})
 
-        v_color = {'매수':'<strong style="color:#00ff88">매수 신호</strong>','매도':'<strong style="color:#ff3b5c">매도 신호</strong>','관망':'<strong style="color:#ffb800">관망</strong>'}
-        summary = f"<strong>{ticker}</strong> 종목 분석 결과, 전반적으로 {v_color[verdict]}가 우세합니다 (매수 {buy_score}점 vs 매도 {sell_score}점). "
-        summary += f"RSI는 {rsi_val:.1f}로 {'과매도 구간, 반등 가능성.' if rsi_val<30 else '과매수 구간, 조정 가능성.' if rsi_val>70 else '중립 구간.'} "
-        summary += f"{'단기 이동평균이 중장기선을 상회, 상승 모멘텀.' if ma5_val>ma20_val else '단기 이동평균이 중장기선을 하회, 하락 압력.'} "
-        summary += f"볼린저밴드 위치 {bb_pos:.0f}%, 거래량 평균 대비 {vol_ratio:.1f}배."
+@app.route('/report')
+def report():
+    ticker = request.args.get('ticker', '').upper()
+    if not ticker:
+        return jsonify({'error': '티커를 입력해주세요.', 'news': []})
+    try:
+        chart = chart_params()
+    except ValueError as e:
+        return jsonify({'error': str(e), 'news': []})
+    fetched = fetch_report(ticker, *chart[:2])
+    tag = report_etag(ticker, fetched[0], *chart, wants_columnar())
+    cached = not_modified(tag)
+    if cached is not None:
+        return cached
+    data = build_report(ticker, wants_columnar(), *chart, fetched=fetched)
+    with span('serialize'):
+        return with_etag(jsonify(data), tag if 'error' not in data else None)
+
+@app.route('/stream')
+def stream():
+    ticker = request.args.get('ticker', '').upper()
+    if not ticker:
+        return jsonify({'error': '티커를 입력해주세요.'})
+    try:
+        chart = chart_params()
+    except ValueError as e:
+        return jsonify({'error': str(e)})
+    feed = feeds.get(ticker, chart)
+    q = feed.subscribe()
+
+    def events():
+        try:
+            yield f'retry: {int(STREAM_INTERVAL * 1000)}\n\n'
+            while True:
+                try:
+                    kind, payload = q.get(timeout=STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'event: {kind}\ndata: {app.json.dumps(payload)}\n\n'
+        finally:
+            feed.unsubscribe(q)
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/scan', methods=['GET', 'POST'])
+def scan():
+    tickers = request_tickers()
+    if not tickers:
+        return jsonify({'error': '티커를 입력해주세요.', 'results': []})
+    if len(tickers) > SCAN_MAX:
+        return jsonify({'error': f'한 번에 최대 {SCAN_MAX}개 종목까지 스캔할 수 있습니다.', 'results': []})
+    try:
+        _, lookback = history_plan(DEFAULT_PERIOD, '1d')
+        with span('fetch_bulk'):
+            data = get_bulk_history(tickers, lookback)
+        if data.empty:
+            return jsonify({'count': 0, 'results': not_found(tickers)})
+        with span('indicators'):
+            done, rows = bulk_snapshots(data, tickers, lookback)
+        if not done:
+            return jsonify({'count': 0, 'results': not_found(tickers)})
+        v = snapshot_columns(rows)
+        signals = rule_signals(v)
+        buy, sell = rule_scores(signals)
+        verdicts = verdict_of(buy, sell)
+        confidence = confidence_of(buy, sell)
 
-        def safe_list(s):
-            return [None if (v is None or (isinstance(v, float) and np.isnan(v))) else round(float(v), 4) for v in s]
-
-        return jsonify({
-            'ticker': ticker,
-            'name': info.get('shortName', info.get('longName', '')),
-            'price_fmt': price_fmt,
-            'price_change': price_change,
-            'verdict': verdict,
-            'buy_score': buy_score,
-            'sell_score': sell_score,
-            'confidence': confidence,
-            'indicators': indicators,
-            'summary': summary,
-            'dates': [str(d.date()) for d in hist.index],
-            'prices': safe_list(closes),
-            'ma5': safe_list(ma5),
-            'ma20': safe_list(ma20),
-            'bb_upper': safe_list(bb_upper),
-            'bb_lower': safe_list(bb_lower),
-        })
+        results = []
+        for i, ticker in enumerate(done):
+            vi = rows[i]
+            is_kr = ticker.endswith('.KS') or ticker.endswith('.KQ')
+            results.append({
+                'ticker': ticker,
+                'price': vi['price'],
+                'price_fmt': f"{vi['price']:,.0f}원" if is_kr else f"${vi['price']:,.2f}",
+                'price_change': vi['price_change'],
+                'verdict': str(verdicts[i]),
+                'buy_score': int(buy[i]),
+                'sell_score': int(sell[i]),
+                'score': int(buy[i] - sell[i]),
+                'confidence': float(confidence[i]),
+                'indicators': describe_indicators(vi, signals[:, i]),
+            })
+        results.sort(key=lambda r: (r['score'], r['confidence']), reverse=True)
+        kept = set(done)
+        missing = not_found([t for t in tickers if t not in kept])
+        with span('serialize'):
+            return jsonify({'count': len(results), 'results': results + missing})
     except Exception as e:
-        return jsonify({'error': f'분석 중 오류 발생: {str(e)}'})
+        return jsonify({'error': f'스캔 중 오류 발생: {str(e)}', 'results': []})
+
+@app.route('/backtest', methods=['GET', 'POST'])
+def backtest_route():
+    """tickers 의 period 일봉 전체에 점수 규칙을 적용한 과거 성과. 임계값은 JSON 본문의 thresholds 나
+    같은 이름의 쿼리 파라미터(rsi_low=25 ...)로 바꾼다. horizon: 적중 판정 봉 수, cost: 1회 매매 비용(bp), short=1: 매도 판정에 공매도."""
+    tickers = request_tickers()
+    if not tickers:
+        return jsonify({'error': '티커를 입력해주세요.', 'results': []})
+    if len(tickers) > SCAN_MAX:
+        return jsonify({'error': f'한 번에 최대 {SCAN_MAX}개 종목까지 백테스트할 수 있습니다.', 'results': []})
+    body = request.get_json(silent=True) or {}
+    try:
+        period = request.args.get('period', '5y')
+        parse_period(period)
+        horizon = min(max(request.args.get('horizon', 5, type=int), 1), 250)
+        cost = request.args.get('cost', 0.0, type=float) / 10000
+        short = request.args.get('short', '0') not in ('0', 'false', '')
+        th = {k: float((body.get('thresholds') or {}).get(k, request.args.get(k, default))) for k, default in RULE_THRESHOLDS.items()}
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'잘못된 파라미터: {e}', 'results': []})
+    try:
+        with span('fetch_bulk'):
+            data = get_bulk_history(tickers, period)
+        if data.empty:
+            return jsonify({'count': 0, 'period': period, 'horizon': horizon, 'thresholds': th, 'results': not_found(tickers)})
+        with span('indicators'):
+            closes, volumes = tail_aligned(data['Close'].reindex(columns=tickers), data['Volume'].reindex(columns=tickers), len(data))
+            counts = closes.notna().sum().to_numpy()
+            v = indicator_panel(closes, volumes)
+        with span('backtest'):
+            bt = backtest(v, th, horizon, cost, short)
+            stats = {k: safe_list(bt[k]) for k in ('hit_rate', 'avg_return', 'total_return', 'benchmark_return', 'max_drawdown', 'sharpe', 'exposure')}
+
+        results, missing = [], []
+        for i, ticker in enumerate(tickers):
+            if counts[i] < 90:
+                missing.append({'ticker': ticker, 'error': f"'{ticker}' 데이터가 부족합니다."})
+                continue
+            results.append({
+                'ticker': ticker,
+                'bars': int(counts[i]),
+                'signals': int(bt['signals'][i]),
+                'trades': int(bt['trades'][i]),
+                **{k: x[i] for k, x in stats.items()},
+                'verdict': str(verdict_label(bt['verdict'][-1, i])),
+            })
+        results.sort(key=lambda r: r['total_return'], reverse=True)
+        with span('serialize'):
+            return jsonify({'count': len(results), 'period': period, 'horizon': horizon, 'thresholds': th,
+                            'results': results + missing})
+    except Exception as e:
+        return jsonify({'error': f'백테스트 중 오류 발생: {str(e)}', 'results': []})
+
+@app.route('/portfolio', methods=['GET', 'POST'])
+def portfolio():
+    """비중을 준 종목 묶음의 위험 지표와 비중 가중 신호. 모든 종목과 지수를 한 번에 받아 행렬 연산으로 계산한다.
+    period: 수익률 구간(기본 1y), benchmark: 베타 기준 지수(기본은 비중이 더 큰 시장의 지수),
+    confidence: VaR 신뢰수준(기본 0.95), matrix=0: 상관행렬 생략. 비중은 절댓값 합이 1 이 되게 맞춘다."""
+    try:
+        holdings = request_holdings()
+        period = request.args.get('period', '1y')
+        parse_period(period)
+        confidence = request.args.get('confidence', 0.95, type=float)
+        if not 0.5 <= confidence < 1:
+            raise ValueError('confidence 는 0.5 이상 1 미만이어야 합니다.')
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'잘못된 파라미터: {e}', 'holdings': []})
+    if not holdings:
+        return jsonify({'error': '티커를 입력해주세요.', 'holdings': []})
+    if len(holdings) > SCAN_MAX:
+        return jsonify({'error': f'한 번에 최대 {SCAN_MAX}개 종목까지 분석할 수 있습니다.', 'holdings': []})
+    tickers = list(holdings)
+    weights = np.array(list(holdings.values()))
+    kr = np.array([market_of(t) == 'KR' for t in tickers])
+    benchmark = (request.args.get('benchmark') or BENCHMARKS['KR' if np.abs(weights[kr]).sum() > np.abs(weights[~kr]).sum() else 'US']).upper()
+    columns = list(dict.fromkeys(tickers + [benchmark]))
+    try:
+        _, lookback = history_plan(DEFAULT_PERIOD, '1d')
+        with span('fetch_bulk'):
+            data = get_bulk_history(columns, period)
+            # 신호는 /analyze·/scan 과 같은 준비 구간으로 같은 지표 엔진에서 얻는다
+            signal_data = data if period == lookback else get_bulk_history(tickers, lookback)
+        if data.empty:
+            return jsonify({'error': '데이터를 찾을 수 없습니다.', 'holdings': not_found(tickers)})
+        with span('indicators'):
+            done, snaps = bulk_snapshots(signal_data, tickers, lookback) if not signal_data.empty else ([], [])
+            net = {}
+            if done:
+                buy, sell = rule_scores(rule_signals(snapshot_columns(snaps)))
+                net = dict(zip(done, buy - sell))
+        with span('risk'):
+            prices = session_closes(data['Close'].reindex(columns=columns)).ffill(limit=5).to_numpy(dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = prices[1:] / prices[:-1] - 1
+            valid = ~np.isnan(returns)
+            b = columns.index(benchmark)
+            if valid[:, b].sum() < 30:
+                return jsonify({'error': f"지수 '{benchmark}' 데이터를 찾을 수 없습니다.", 'holdings': []})
+            keep = np.flatnonzero(valid[:, :len(tickers)].sum(axis=0) >= 30)
+            rows = valid[:, keep].all(axis=1) & valid[:, b]
+            if not len(keep) or rows.sum() < 30:
+                return jsonify({'error': '수익률을 계산할 공통 거래일이 부족합니다.', 'holdings': []})
+            w = weights[keep] / np.abs(weights[keep]).sum()
+            risk = portfolio_risk(returns[rows][:, keep], w, returns[rows, b], confidence)
+        score = np.array([net.get(tickers[j], 0) for j in keep], dtype=float)   # 지표를 낼 봉이 모자란 종목은 관망
+        total = float(w @ score)
+        per = {k: safe_list(risk[k]) for k in ('volatility', 'annual_return', 'beta', 'risk_contribution')}
+        verdicts = verdict_of(score, 0)
+        out = [{'ticker': tickers[j], 'weight': round(float(w[i]), 6), **{k: x[i] for k, x in per.items()},
+                'score': int(score[i]), 'verdict': str(verdicts[i])}
+               for i, j in enumerate(keep)]
+        kept = set(keep.tolist())
+        missing = [{'ticker': t, 'error': f"'{t}' 데이터가 부족합니다."} for j, t in enumerate(tickers) if j not in kept]
+        result = {
+            'count': len(out), 'period': period, 'benchmark': benchmark, 'confidence': confidence,
+            'portfolio': {**{k: round(x, 6) for k, x in risk['portfolio'].items()},
+                          'score': round(total, 4), 'verdict': str(verdict_of(total, 0))},
+            'holdings': out + missing,
+        }
+        if request.args.get('matrix', '1') != '0':
+            result['correlation'] = {'tickers': [tickers[j] for j in keep], 'matrix': safe_list(risk['corr'])}
+        with span('serialize'):
+            return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': f'포트폴리오 분석 중 오류 발생: {str(e)}', 'holdings': []})
+
+@app.route('/screen')
+def screen():
+    """미리 계산해 둔 지표 표 조회. 예: /screen?where=rsi<30,vol_ratio>1.5&exchange=KS&sort=-vol_ratio&limit=50
+    where 는 여러 번 줄 수 있고 모든 조건을 만족해야 한다. market=KR|US, exchange=KS|KQ|US|..., verdict=매수|관망|매도."""
+    screener.start()
+    table = screener.table
+    if table is None:
+        if not screener.tickers():
+            return jsonify({'error': 'STOCKSCAN_UNIVERSE 에 스크리닝할 종목을 설정해주세요.', 'results': []})
+        return jsonify({'error': '지표 표를 만드는 중입니다. 잠시 후 다시 시도해주세요.', 'results': []})
+    try:
+        conditions = parse_conditions(','.join(request.args.getlist('where')))
+    except ValueError as e:
+        return jsonify({'error': str(e), 'results': []})
+    groups = [(k, request.args[k].upper()) for k in ('market', 'exchange') if request.args.get(k)]
+    verdict = request.args.get('verdict')
+    if verdict:
+        if verdict not in VERDICT_LABELS:
+            return jsonify({'error': f'잘못된 verdict: {verdict}', 'results': []})
+        conditions.append(('verdict', '=', VERDICT_LABELS.index(verdict) - 1))
+    sort = request.args.get('sort', '-score')
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-+')
+    if sort not in SCREEN_FIELDS:
+        return jsonify({'error': f'잘못된 정렬 필드: {sort}', 'results': []})
+    limit = min(max(request.args.get('limit', 100, type=int), 1), SCAN_MAX)
+    tag = hashlib.sha1(repr((BUILD_ID, table.as_of, sorted(request.args.items(multi=True)))).encode()).hexdigest()[:20]
+    cached = not_modified(tag)
+    if cached is not None:
+        return cached
+    with span('screen'):
+        rows = table.query(conditions, groups, sort, descending)
+        results = table.records(rows[:limit])
+    with span('serialize'):
+        return with_etag(jsonify({'count': len(rows), 'total': table.n, 'as_of': int(table.as_of),
+                                  'age': round(time.time() - table.as_of, 1), 'results': results}), tag)
+
+if METRICS_ENABLED:
+    @app.before_request
+    def start_request_timer():
+        g.t0 = time.perf_counter()
+        g.timings = []
+
+    @app.after_request
+    def finish_request_timer(response):
+        elapsed = time.perf_counter() - g.t0
+        endpoint = request.endpoint or 'unknown'
+        metrics.inc('stockscan_requests_total', endpoint=endpoint, status=response.status_code)
+        metrics.observe('stockscan_request_seconds', elapsed, endpoint=endpoint)
+        if SERVER_TIMING:
+            parts = [f'{stage};dur={sec * 1000:.2f}' for stage, sec in g.timings]
+            response.headers['Server-Timing'] = ', '.join(parts + [f'total;dur={elapsed * 1000:.2f}'])
+        return response
+
+@app.route('/alerts')
+def alerts_recent():
+    """최근 알림 (새것부터). limit 기본 100."""
+    limit = min(max(request.args.get('limit', 100, type=int), 1), ALERT_HISTORY)
+    recent = alerts.recent_alerts()[::-1][:limit]
+    return jsonify({'count': len(recent), 'rules': len(alerts.rule_list()), 'results': recent})
+
+@app.route('/alerts/rules', methods=['GET', 'POST'])
+def alert_rules():
+    """GET: 규칙 목록. POST: {"ticker": "AAPL", "when": "rsi < 30", "name": "..."} 또는 {"rules": [...]} 로 추가.
+    ticker 를 빼면 universe 의 모든 종목에 적용한다. when 은 /screen 의 where 와 같은 조건을 ',' 나 'and' 로 잇는다."""
+    if request.method == 'GET':
+        return jsonify({'rules': alerts.rule_list()})
+    body = request.get_json(silent=True) or {}
+    items = body.get('rules') if isinstance(body.get('rules'), list) else [body]
+    added = []
+    for item in items:
+        try:
+            added.append(alerts.add(item.get('ticker'), str(item.get('when') or ''), item.get('name')))
+        except (AttributeError, ValueError) as e:
+            return jsonify({'error': f'잘못된 규칙: {e}', 'added': added})
+    screener.start()
+    return jsonify({'added': added})
+
+@app.route('/alerts/rules/<rule_id>', methods=['DELETE'])
+def delete_alert_rule(rule_id):
+    if not alerts.remove(rule_id):
+        return jsonify({'error': f'규칙을 찾을 수 없습니다: {rule_id}'})
+    return jsonify({'deleted': rule_id})
+
+if COMPRESS_ENABLED:
+    @app.after_request
+    def compress_response(response):
+        """충분히 큰 JSON·텍스트 응답을 클라이언트가 받는 방식(br 우선, gzip)으로 압축한다. 스트림(SSE)은 건드리지 않는다."""
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESS_TYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        encoding = negotiate_encoding() if len(body) >= COMPRESS_MIN_SIZE else None
+        if encoding is None:
+            return response
+        with span('compress'):
+            response.set_data(brotli.compress(body, quality=5) if encoding == 'br' else gzip.compress(body, 6, mtime=0))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+@app.route('/healthz')
+def healthz():
+    """프로세스가 살아 있으면 200. 무거운 모듈을 건드리지 않는다."""
+    return jsonify({'status': 'ok', 'pid': os.getpid(), 'uptime': round(time.time() - STARTED, 1)})
+
+@app.route('/readyz')
+def readyz():
+    """분석 요청을 바로 처리할 수 있으면 200, 아니면 503. 모듈을 아직 불러오는 중이면 불러오기를 시작해 두고 503 으로 답한다."""
+    checks = {'modules': heavy_modules_loaded()}
+    if not checks['modules'] and not _warming.locked():
+        warm_up()
+    if shared_cache is not None:
+        try:
+            shared_cache.get('readyz')
+            checks['shared_cache'] = True
+        except Exception:
+            checks['shared_cache'] = False
+    ready = all(checks.values())
+    response = jsonify({'status': 'ready' if ready else 'starting', 'checks': checks, 'uptime': round(time.time() - STARTED, 1)})
+    response.status_code = 200 if ready else 503
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    caches = (('history', history_cache), ('info', info_cache), ('news', news_cache), ('analysis', analysis_cache))
+    return Response(metrics.render(caches, sorted(provider.breakers.items())), mimetype='text/plain; version=0.0.4')
+
+@app.route('/cache/stats')
+def cache_stats():
+    stats = {'history': history_cache.stats(), 'info': info_cache.stats(), 'news': news_cache.stats(), 'analysis': analysis_cache.stats()}
+    if shared_cache is not None:
+        stats['shared'] = shared_cache.stats()
+    return jsonify(stats)
 
 @app.route('/news')
 def get_news():
@@ -491,52 +3238,98 @@ def get_news():
     if not ticker:
         return jsonify({'news': []})
     try:
-        stock = yf.Ticker(ticker)
-        news = stock.news or []
-        result = []
-        for item in news[:8]:
-            c = item.get('content', item)
-            title = c.get('title', '')
-            link = (c.get('canonicalUrl') or {}).get('url', '') or c.get('link', '')
-            pub_ts = c.get('pubDate', '') or c.get('providerPublishTime', 0)
-            publisher = (c.get('provider') or {}).get('displayName', '') or c.get('publisher', '')
-            try:
-                if isinstance(pub_ts, (int, float)) and pub_ts > 0:
-                    date_str = datetime.datetime.fromtimestamp(pub_ts).strftime('%Y-%m-%d')
-                else:
-                    date_str = str(pub_ts)[:10]
-            except:
-                date_str = ''
-
-            bad_kr = ['하락','급락','손실','적자','위기','악재','소송','제재','리콜','경고','하향','매도','우려','둔화','감소','부진']
-            good_kr = ['상승','급등','호재','실적','흑자','성장','신고가','매수','상향','확대','증가','호조','계약','협약','개발','출시']
-            bad_en = ['fall','drop','decline','loss','lawsuit','recall','warning','downgrade','sell','concern','slow','cut','weak','plunge']
-            good_en = ['rise','surge','gain','profit','growth','high','buy','upgrade','expand','record','deal','launch','beat','soar']
-
-            sentiment = '중립'
-            for kw in bad_kr:
-                if kw in title: sentiment = '악재'; break
-            if sentiment == '중립':
-                for kw in good_kr:
-                    if kw in title: sentiment = '호재'; break
-            tl = title.lower()
-            if sentiment == '중립':
-                for kw in bad_en:
-                    if kw in tl: sentiment = '악재'; break
-            if sentiment == '중립':
-                for kw in good_en:
-                    if kw in tl: sentiment = '호재'; break
-
-            if title:
-                result.append({'title': title, 'link': link, 'date': date_str, 'publisher': publisher, 'sentiment': sentiment})
-        return jsonify({'news': result})
+        with span('fetch_news'):
+            items = get_news_items(ticker)
+        with span('sentiment'):
+            news = build_news(items)
+        with span('serialize'):
+            return jsonify({'news': news})
     except Exception as e:
         return jsonify({'news': [], 'error': str(e)})
 
-if __name__ == '__main__':
-    port = int(__import__('os').environ.get('PORT', 5000))
+@app.route('/news/batch', methods=['GET', 'POST'])
+def news_batch():
+    tickers = request_tickers()
+    if not tickers:
+        return jsonify({'error': '티커를 입력해주세요.', 'results': {}})
+    if len(tickers) > SCAN_MAX:
+        return jsonify({'error': f'한 번에 최대 {SCAN_MAX}개 종목까지 조회할 수 있습니다.', 'results': {}})
+    limit = min(max(request.args.get('limit', 8, type=int), 1), NEWS_LIMIT_MAX)
+    with_items = request.args.get('items', '1') != '0'
+    results, errors = fetch_concurrently({t: (lambda t=t: get_news_items(t)) for t in tickers}, pool=batch_pool)
+    with span('sentiment'):
+        per_ticker = {t: news_rows(results.get(t) or [], limit) for t in tickers}
+        score_news([row for rows in per_ticker.values() for row in rows])   # 관심 종목 전체 헤드라인을 한 번에
+    out = {}
+    for t, rows in per_ticker.items():
+        total = sum(r['score'] for r in rows)
+        counts = {label: sum(r['sentiment'] == label for r in rows) for label in ('호재', '악재', '중립')}
+        out[t] = {'score': total, 'sentiment': sentiment_label(total), 'counts': counts}
+        if with_items:
+            out[t]['news'] = rows
+        if t in errors:
+            out[t]['error'] = errors[t]
+    with span('serialize'):
+        return jsonify({'results': out})
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='stockscan')
+    sub = parser.add_subparsers(dest='command')
+    sub.add_parser('serve', help='웹 서버 실행 (기본)')
+    rec = sub.add_parser('record', help='yfinance 응답을 오프라인 픽스처로 저장')
+    rec.add_argument('tickers', nargs='+')
+    rec.add_argument('--dir', default='fixtures')
+    rec.add_argument('--period', default='1y')
+    sw = sub.add_parser('sweep', help='지표·임계값 파라미터 탐색 (CPU 코어 병렬)')
+    sw.add_argument('tickers', nargs='*')
+    sw.add_argument('--tickers-file', help='한 줄에 티커 하나')
+    sw.add_argument('--period', default='5y')
+    sw.add_argument('--grid', action='append', default=[], metavar='이름=값,값,...',
+                    help=f'예: --grid rsi_period=7,14,21 --grid rsi_low=20,25,30 (이름: {", ".join([*INDICATOR_PARAMS, *RULE_THRESHOLDS])})')
+    sw.add_argument('--grid-file', help='{"이름": [값, ...]} 형식 JSON')
+    sw.add_argument('--random', type=int, default=0, help='격자 전체 대신 무작위로 고를 조합 수')
+    sw.add_argument('--seed', type=int, default=0)
+    sw.add_argument('--workers', type=int, default=os.cpu_count(), help='프로세스 수 (0: 현재 프로세스에서 실행)')
+    sw.add_argument('--horizon', type=int, default=5)
+    sw.add_argument('--cost', type=float, default=0.0, help='1회 매매 비용 (bp)')
+    sw.add_argument('--short', action='store_true')
+    sw.add_argument('--objective', choices=SWEEP_OBJECTIVES, default='sharpe')
+    sw.add_argument('--top', type=int, default=10)
+    sw.add_argument('--out', help='결과 JSON Lines 파일 (기본: 표준출력)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        record_fixtures([t.upper() for t in args.tickers], args.dir, args.period)
+        return
+    if args.command == 'sweep':
+        tickers = list(args.tickers)
+        if args.tickers_file:
+            with open(args.tickers_file, encoding='utf-8') as f:
+                tickers += f.read().split()
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+        space = {}
+        if args.grid_file:
+            with open(args.grid_file, encoding='utf-8') as f:
+                space.update(json.load(f))
+        for item in args.grid:
+            name, _, values = item.partition('=')
+            space[name.strip()] = [json.loads(x) for x in values.split(',') if x.strip()]
+        if not tickers or not space:
+            parser.error('sweep 에는 티커와 --grid/--grid-file 이 필요합니다')
+        unknown = set(space) - set(INDICATOR_PARAMS) - set(RULE_THRESHOLDS)
+        if unknown:
+            parser.error(f'알 수 없는 파라미터: {", ".join(sorted(unknown))}')
+        run_sweep(tickers, args.period, space, args.random, args.seed, args.workers, args.horizon,
+                  args.cost / 10000, args.short, args.objective, args.top, args.out)
+        return
+    port = int(os.environ.get('PORT', 5000))
+    screener.start()
     print("=" * 50)
     print("  STOCKSCAN 실행 중...")
     print(f"  브라우저에서 http://localhost:{port} 접속!")
     print("=" * 50)
     app.run(debug=False, host='0.0.0.0', port=port)
+
+if __name__ == '__main__':
+    main()
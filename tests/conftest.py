@@ -0,0 +1,8 @@
+import os
+import sys
+
+# 네트워크·디스크 없이 돌도록 stockscan 을 import 하기 전에 설정한다
+os.environ.setdefault('STOCKSCAN_PROVIDER', 'fixture')
+os.environ.setdefault('STOCKSCAN_STORE', '0')
+os.environ.setdefault('STOCKSCAN_SHARED_CACHE', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,126 @@
+"""AlertEngine 이 거짓 → 참으로 바뀐 규칙만 알리는지, 규칙 파일이 깨져도 버티는지."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import stockscan as s
+
+
+def table(values, as_of=0):
+    """{티커: {필드: 값}} → ScreenTable. 주지 않은 필드는 50."""
+    tickers = list(values)
+    cols = {f: np.array([values[t].get(f, 50.0) for t in tickers], dtype=float) for f in s.SCREEN_FIELDS}
+    return s.ScreenTable(tickers, {**cols, 'verdict': np.zeros(len(tickers), dtype=int)}, as_of)
+
+
+def fired(engine, prev, cur):
+    return sorted((a['id'], a['ticker']) for a in engine.evaluate(prev, cur))
+
+
+@pytest.mark.parametrize('ticker', ['*', 'AAA'])
+def test_fires_only_on_false_to_true(ticker):
+    engine = s.AlertEngine()
+    rule = engine.add(ticker, 'rsi<30')
+    steps = [40, 25, 20, 45, 29, 29]
+    tables = [table({'AAA': {'rsi': v}, 'BBB': {'rsi': 60}}, i) for i, v in enumerate(steps)]
+    got = [fired(engine, prev, cur) for prev, cur in zip(tables, tables[1:])]
+    assert got == [[(rule['id'], 'AAA')], [], [], [(rule['id'], 'AAA')], []]
+
+
+def test_first_table_and_new_tickers_are_baseline():
+    engine = s.AlertEngine()
+    engine.add('*', 'rsi<30')
+    engine.add('CCC', 'rsi<30')
+    first = table({'AAA': {'rsi': 10}})
+    assert fired(engine, None, first) == []
+    second = table({'AAA': {'rsi': 10}, 'CCC': {'rsi': 10}})
+    assert fired(engine, first, second) == []
+    third = table({'AAA': {'rsi': 10}, 'CCC': {'rsi': 50}})
+    fourth = table({'AAA': {'rsi': 10}, 'CCC': {'rsi': 20}})
+    assert fired(engine, second, third) == []
+    assert fired(engine, third, fourth) == [('1', 'CCC'), ('2', 'CCC')]
+
+
+@pytest.mark.parametrize('ticker', ['*', 'AAA'])
+def test_nan_is_false(ticker):
+    engine = s.AlertEngine()
+    engine.add(ticker, 'vol_ratio>2')
+    steps = [1.0, np.nan, np.nan, 3.0, np.nan, 3.0]
+    tables = [table({'AAA': {'vol_ratio': v}}, i) for i, v in enumerate(steps)]
+    got = [len(engine.evaluate(prev, cur)) for prev, cur in zip(tables, tables[1:])]
+    assert got == [0, 0, 1, 0, 1]
+
+
+@pytest.mark.parametrize('ticker', ['*', 'AAA'])
+def test_multi_clause_fires_when_the_last_clause_turns_true(ticker):
+    engine = s.AlertEngine()
+    engine.add(ticker, 'rsi<30, vol_ratio>2')
+    steps = [(40, 1), (25, 1), (25, 3), (25, 3), (40, 3), (20, 3), (20, 1), (35, 3)]
+    tables = [table({'AAA': {'rsi': r, 'vol_ratio': v}}, i) for i, (r, v) in enumerate(steps)]
+    got = [len(engine.evaluate(prev, cur)) for prev, cur in zip(tables, tables[1:])]
+    assert got == [0, 1, 0, 0, 1, 0, 0]
+
+
+def test_matches_brute_force():
+    rng = np.random.default_rng(0)
+    tickers = [f'T{i:02d}' for i in range(40)]
+    fields = ['rsi', 'vol_ratio', 'score']
+    engine = s.AlertEngine()
+    for i in range(300):
+        clauses = [f'{f}{rng.choice(list(s.SCREEN_OPS))}{rng.integers(0, 10)}' for f in rng.choice(fields, rng.integers(1, 3), replace=False)]
+        engine.add(tickers[i % 40] if i % 3 else '*', ','.join(clauses))
+    rules = [(rule, conditions) for rule, conditions in engine.rules.values()]
+
+    def values():
+        v = rng.integers(0, 10, (len(tickers), len(fields))).astype(float)
+        v[rng.random(v.shape) < 0.1] = np.nan
+        return {t: dict(zip(fields, row)) for t, row in zip(tickers, v)}
+
+    def holds(row, conditions):
+        return all(s.SCREEN_OPS[op](row[f], value) for f, op, value in conditions)
+
+    prev_values = values()
+    prev = table(prev_values)
+    for step in range(1, 6):
+        cur_values = values()
+        cur = table(cur_values, step)
+        expected = sorted((rule['id'], t) for rule, conditions in rules for t in tickers
+                          if rule['ticker'] in ('*', t) and holds(cur_values[t], conditions) and not holds(prev_values[t], conditions))
+        assert fired(engine, prev, cur) == expected
+        prev, prev_values = cur, cur_values
+
+
+def test_broken_rules_file_falls_back_to_empty(tmp_path, capsys):
+    path = tmp_path / 'alert_rules.json'
+    path.write_text('[{"id": "1", "ticker": "*", "when": "rsi<30"', encoding='utf-8')
+    engine = s.AlertEngine(str(path))
+    assert engine.rule_list() == []
+    assert 'alert_rules.json' in capsys.readouterr().err
+    assert fired(engine, table({'AAA': {'rsi': 40}}), table({'AAA': {'rsi': 20}})) == []
+    rule = engine.add('*', 'rsi<30')
+    assert s.AlertEngine(str(path)).rule_list() == [rule]
+
+
+def test_leader_lease_is_renewed_and_taken_over(tmp_path, monkeypatch):
+    monkeypatch.setattr(s.Screener, 'LEASE', 0.3)
+    shared = s.SQLiteCache(str(tmp_path / 'cache.sqlite'))
+    first, second = s.Screener([], 300, shared), s.Screener([], 300, shared)
+
+    def in_thread(fn):
+        out = []
+        worker = threading.Thread(target=lambda: out.append(fn()))
+        worker.start()
+        worker.join()
+        return out[0]
+
+    assert first.lead()
+    for _ in range(3):
+        time.sleep(0.15)
+        assert first.lead()                       # 연장하는 동안에는 다른 워커가 못 잡는다
+        assert not in_thread(second.lead)
+    time.sleep(0.35)                            # 맡은 워커가 죽으면 lease 가 끝난 뒤 넘어간다
+    assert in_thread(second.lead)
+    assert not first.lead()
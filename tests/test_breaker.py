@@ -0,0 +1,107 @@
+"""CircuitBreaker 상태 전이와 ResilientProvider 의 재시도·실패 집계."""
+
+import time
+import urllib.error
+
+import pytest
+
+import stockscan as s
+
+
+def test_opens_after_consecutive_failures():
+    b = s.CircuitBreaker('t', threshold=3, cooldown=60)
+    b.failure(); b.failure(); b.success(); b.failure(); b.failure()
+    assert b.state() == 'closed'
+    b.before()
+    b.failure()
+    assert b.state() == 'open'
+    with pytest.raises(s.UpstreamUnavailable):
+        b.before()
+
+
+def test_half_open_lets_one_trial_through():
+    b = s.CircuitBreaker('t', threshold=1, cooldown=0.05)
+    b.failure()
+    time.sleep(0.06)
+    assert b.state() == 'half_open'
+    b.before()
+    with pytest.raises(s.UpstreamUnavailable):
+        b.before()   # 시험 호출이 끝나기 전에는 다른 호출을 거절한다
+    b.success()
+    assert b.state() == 'closed' and b.failures == 0
+    b.before()
+
+
+def test_failed_trial_doubles_cooldown_up_to_max():
+    b = s.CircuitBreaker('t', threshold=1, cooldown=0.05, max_cooldown=0.15)
+    b.failure()
+    for expected in (0.1, 0.15, 0.15):
+        time.sleep(b.cooldown + 0.01)
+        b.before()
+        b.failure()
+        assert b.state() == 'open' and b.cooldown == pytest.approx(expected)
+    time.sleep(b.cooldown + 0.01)
+    b.before()
+    b.success()
+    assert b.cooldown == 0.05
+
+
+class Flaky(s.MarketDataProvider):
+    def __init__(self, errors):
+        self.errors, self.calls = list(errors), 0
+
+    def info(self, ticker):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {'symbol': ticker}
+
+
+def resilient(inner, threshold=2):
+    p = s.ResilientProvider(inner, retries=2, base=0, cap=0)
+    p.breakers = {call: s.CircuitBreaker(call, threshold=threshold, cooldown=60) for call in p.breakers}
+    return p
+
+
+def test_one_failure_per_logical_call():
+    inner = Flaky([ConnectionError()] * 3)
+    p = resilient(inner)
+    with pytest.raises(ConnectionError):
+        p.info('AAA')
+    assert inner.calls == 3 and p.breakers['info'].failures == 1
+    assert p.breakers['info'].state() == 'closed'
+
+
+def test_retry_success_does_not_count():
+    inner = Flaky([ConnectionError(), TimeoutError()])
+    p = resilient(inner)
+    assert p.info('AAA') == {'symbol': 'AAA'}
+    assert inner.calls == 3 and p.breakers['info'].failures == 0
+
+
+@pytest.mark.parametrize('error', [
+    KeyError('AAA'),
+    ValueError('bad period'),
+    urllib.error.HTTPError('https://example.com', 404, 'Not Found', None, None),
+    type('YFTickerMissingError', (Exception,), {})(),
+])
+def test_permanent_errors_are_not_retried_or_counted(error):
+    inner = Flaky([error] * 5)
+    p = resilient(inner, threshold=1)
+    for _ in range(3):
+        with pytest.raises(type(error)):
+            p.info('AAA')
+    assert inner.calls == 3
+    assert p.breakers['info'].state() == 'closed'
+
+
+def test_rate_limit_is_transient():
+    error = urllib.error.HTTPError('https://example.com', 429, 'Too Many Requests', None, None)
+    inner = Flaky([error] * 3)
+    p = resilient(inner, threshold=1)
+    with pytest.raises(urllib.error.HTTPError):
+        p.info('AAA')
+    assert inner.calls == 3 and p.breakers['info'].state() == 'open'
+    with pytest.raises(s.UpstreamUnavailable):
+        p.info('AAA')
+    assert inner.calls == 3
@@ -0,0 +1,27 @@
+"""analysis_etag 가 분석 결과를 바꾸는 봉 변화를 놓치지 않는지."""
+
+import stockscan as s
+
+
+def _hist():
+    return s.FixtureProvider(bars=300).history('AAA', period='1y')
+
+
+def test_same_bars_same_tag():
+    hist = _hist()
+    assert s.analysis_etag('AAA', hist, {}, '1y') == s.analysis_etag('AAA', hist.copy(), {}, '1y')
+    assert s.analysis_etag('AAA', hist, {}, '1y') != s.analysis_etag('AAA', hist, {}, '6mo')
+
+
+def test_adjusted_past_changes_tag():
+    hist = _hist()
+    adjusted = hist.copy()
+    adjusted.iloc[:-1, :4] *= 0.97      # 마지막 봉은 그대로, 그 앞만 배당 수정
+    assert s.analysis_etag('AAA', hist, {}, '1y') != s.analysis_etag('AAA', adjusted, {}, '1y')
+
+
+def test_analyze_answers_304_for_matching_tag():
+    client = s.app.test_client()
+    first = client.get('/analyze?ticker=AAPL')
+    tag = first.headers['ETag']
+    assert client.get('/analyze?ticker=AAPL', headers={'If-None-Match': tag}).status_code == 304
@@ -0,0 +1,86 @@
+"""IncrementalIndicators 가 calc_rsi / calc_macd / calc_bollinger 와 같은 값을 내는지."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import stockscan as s
+
+
+def _bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end='2026-01-02', periods=n, tz='America/New_York')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    volume = rng.lognormal(13, 0.5, n).round()
+    return pd.DataFrame({'Close': close, 'Volume': volume}, index=index)
+
+
+def assert_matches(engine, closes):
+    """engine 에 남은 봉의 지표가 closes(지금까지 넣은 봉 전체)로 계산한 값의 마지막 구간과 같아야 한다."""
+    o, n = engine.cols, engine.n
+    macd, signal, _ = s.calc_macd(closes)
+    bb_upper, _, bb_lower = s.calc_bollinger(closes)
+    expected = {'rsi': s.calc_rsi(closes), 'macd': macd, 'signal': signal, 'bb_upper': bb_upper, 'bb_lower': bb_lower,
+                **{f'ma{k}': closes.rolling(k).mean() for k in (5, 20, 60)}}
+    np.testing.assert_array_equal(o['close'][:n], closes.to_numpy()[-n:])
+    for key, series in expected.items():
+        np.testing.assert_allclose(o[key][:n], series.to_numpy()[-n:], rtol=1e-8, atol=1e-8, equal_nan=True, err_msg=key)
+
+
+def test_full_build():
+    hist = _bars(600)
+    assert_matches(s.IncrementalIndicators().update(hist), hist['Close'])
+
+
+def test_append_new_bars():
+    hist = _bars(600, seed=1)
+    engine = s.IncrementalIndicators()
+    for end in (100, 101, 350, 600):
+        engine.update(hist.iloc[:end])
+        assert_matches(engine, hist['Close'].iloc[:end])
+
+
+def test_replace_last():
+    hist = _bars(300, seed=2)
+    engine = s.IncrementalIndicators().update(hist)
+    for factor in (1.01, 0.97, 1.0):
+        tick = hist.copy()
+        tick.iloc[-1, 0] *= factor
+        tick.iloc[-1, 1] += 1000
+        engine.update(tick)
+        assert engine.n == len(hist)
+        assert_matches(engine, tick['Close'])
+
+
+def test_rebuild_after_adjusted_past():
+    hist = _bars(300, seed=3)
+    engine = s.IncrementalIndicators().update(hist)
+    adjusted = hist.copy()
+    adjusted.iloc[:150, 0] *= 0.5        # 분할 등으로 과거 봉이 수정됨
+    engine.update(adjusted)
+    assert_matches(engine, adjusted['Close'])
+
+
+@pytest.mark.parametrize('window', [80, 250])
+def test_sliding_window_is_trimmed(window):
+    hist = _bars(1500, seed=4)
+    engine = s.IncrementalIndicators()
+    start = 50
+    for end in range(start + window, len(hist) + 1, 7):
+        engine.update(hist.iloc[end - window:end])
+        assert engine.n <= window + engine.margin
+    assert_matches(engine, hist['Close'].iloc[start:end])
+
+
+def test_nan_close_is_skipped():
+    hist = _bars(300, seed=5)
+    gappy = hist.copy()
+    gappy.iloc[[40, 41, 150, 299], 0] = np.nan      # 거래정지·미완성 봉
+    gappy.iloc[[60, 200], 1] = np.nan
+    engine = s.IncrementalIndicators().update(gappy.iloc[:200])
+    engine.update(gappy)
+    clean = gappy.dropna(subset=['Close'])
+    assert engine.n == len(clean)
+    assert_matches(engine, clean['Close'])
+    v, _ = engine.snapshot()
+    assert all(np.isfinite(v[k]) for k in ('rsi', 'macd', 'ma20', 'ma60', 'vol_ratio'))
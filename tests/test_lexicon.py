@@ -0,0 +1,93 @@
+"""SentimentLexicon 이 키워드별로 하나씩 훑던 채점과 같은 점수를 내는지."""
+
+import re
+
+import numpy as np
+import pytest
+
+import stockscan as s
+
+NEGATE_WINDOW = 12
+
+
+def old_label(title):
+    """사전을 정규식으로 합치기 전의 채점: 목록 순서대로 처음 걸린 키워드가 라벨을 정한다."""
+    bad_kr = ['하락','급락','손실','적자','위기','악재','소송','제재','리콜','경고','하향','매도','우려','둔화','감소','부진']
+    good_kr = ['상승','급등','호재','실적','흑자','성장','신고가','매수','상향','확대','증가','호조','계약','협약','개발','출시']
+    bad_en = ['fall','drop','decline','loss','lawsuit','recall','warning','downgrade','sell','concern','slow','cut','weak','plunge']
+    good_en = ['rise','surge','gain','profit','growth','high','buy','upgrade','expand','record','deal','launch','beat','soar']
+    tl = title.lower()
+    for words, text, label in ((bad_kr, title, '악재'), (good_kr, title, '호재'), (bad_en, tl, '악재'), (good_en, tl, '호재')):
+        if any(kw in text for kw in words):
+            return label
+    return '중립'
+
+
+def keyword_score(title):
+    """키워드마다 제목을 훑어 가중치를 더하고, 사이에 다른 키워드 없이 가까운 앞(영어)·뒤(한국어) 부정어가 있으면
+    부호를 뒤집는 기준 구현."""
+    tl = title.lower()
+    before = re.compile('|'.join(r'\b' + re.escape(w) + r'\b' if w.isalpha() else re.escape(w) + r'\b' for w in s.NEGATORS_BEFORE))
+    clear = lambda text: not any(k in text for k in s.NEWS_TERMS)
+    total = 0.0
+    for kw, w in s.NEWS_TERMS.items():
+        for m in re.finditer(re.escape(kw), tl):
+            if kw.isascii() and m.start() and tl[m.start() - 1].isalnum():
+                continue
+            negated = any(n.end() >= m.start() - NEGATE_WINDOW and clear(tl[n.end():m.start()])
+                          for n in before.finditer(tl, 0, m.start()))
+            for n in s.NEGATORS_AFTER:
+                at = tl.find(n, m.end())
+                if 0 <= at - m.end() <= NEGATE_WINDOW and clear(tl[m.end():at]):
+                    negated = not negated
+                    break
+            total += -w if negated else w
+    return total
+
+
+@pytest.mark.parametrize('title', [h.format(t='AAPL') for h in s.FixtureProvider.HEADLINES])
+def test_labels_match_old_scoring(title):
+    assert s.sentiment_label(s.lexicon.score(title)) == old_label(title)
+
+
+FILLERS = [' 관련 소식이 전해진 가운데 ', ' after the company said that ', ', analysts expect the ', ' 발표 이후 시장에서는 ']
+
+
+def _headline(rng):
+    parts = []
+    for _ in range(rng.integers(1, 4)):
+        term = str(rng.choice(list(s.NEWS_TERMS)))
+        if term.isascii():
+            term = str(rng.choice(['', 'not ', 'no ', "won't ", 'never ', 'without '])) + term.capitalize()
+        else:
+            term += str(rng.choice(['', '하지 않아', ' 없어', '이 아니다', ' 해소', ' 일축']))
+        parts.append(term)
+    return str(rng.choice(FILLERS)).join(parts)
+
+
+def test_negation_matches_keyword_scoring():
+    rng = np.random.default_rng(0)
+    titles = [_headline(rng) for _ in range(500)]
+    expected = [keyword_score(t) for t in titles]
+    assert s.lexicon.score_many(titles) == expected
+    assert any(e < 0 for e in expected) and any(e > 0 for e in expected)
+
+
+@pytest.mark.parametrize('title, score', [
+    ('Shares do not fall after results', 1.0),
+    ("Company won't cut guidance", 1.0),
+    ('실적 부진 우려 해소', 1.0),       # 우려만 뒤집힌다
+    ('적자 아니다', 1.0),
+    ('Executes plan', 0.0),             # 단어 시작에서만 맞춘다
+    ('급락 후 급등', 0.0),
+])
+def test_known_headlines(title, score):
+    assert s.lexicon.score(title) == score
+    assert keyword_score(title) == score
+
+
+def test_batch_limit_is_clamped():
+    client = s.app.test_client()
+    for limit, expected in (('0', 1), ('-5', 1), ('3', 3), ('100000', 8)):
+        body = client.get(f'/news/batch?tickers=AAA&limit={limit}').get_json()
+        assert len(body['results']['AAA']['news']) == expected, limit
@@ -0,0 +1,102 @@
+"""SQLiteCache 를 워커 여럿이 함께 쓸 때의 lease·stale·왕복 동작. 워커는 lease 주인이 다른 스레드로 흉내 낸다."""
+
+import threading
+import time
+
+import pytest
+
+import stockscan as s
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cache.sqlite')
+
+
+def in_thread(fn):
+    """다른 워커(다른 lease 주인)에서 fn() 을 끝까지 실행한 결과."""
+    out = []
+    worker = threading.Thread(target=lambda: out.append(fn()))
+    worker.start()
+    worker.join()
+    return out[0]
+
+
+def test_round_trip_across_instances(path):
+    a, b = s.SQLiteCache(path), s.SQLiteCache(path)
+    now = time.time()
+    a.set('k', {'close': [1.0, 2.0]}, now + 60, now + 120)
+    value, expires, stored = b.get('k')
+    assert value == {'close': [1.0, 2.0]} and expires == now + 60 and stored >= now
+    assert s.SQLiteCache(path, namespace='other').get('k') is None
+    a.set('k', 'expired', now - 1, now - 1)
+    assert b.get('k') is None       # keep 이 지난 행은 없는 것과 같다
+
+
+def test_second_instance_reuses_loaded_value(path):
+    a, b = s.SQLiteCache(path), s.SQLiteCache(path)
+    calls = []
+    loader = lambda: calls.append(1) or 'v'
+    assert a.get_or_load('k', loader, 60)[0] == 'v'
+    assert b.get_or_load('k', loader, 60)[0] == 'v'
+    assert len(calls) == 1 and b.hits == 1
+
+
+def test_expired_lease_is_taken_over(path):
+    a, b = s.SQLiteCache(path), s.SQLiteCache(path)
+    assert in_thread(lambda: a.acquire('k', lease=0.2))     # 잡은 채로 죽은 워커
+    assert not b.acquire('k', lease=60)
+    time.sleep(0.25)
+    assert b.acquire('k', lease=60)
+    assert not in_thread(lambda: a.acquire('k', lease=0.2))
+    b.release('k')
+    assert in_thread(lambda: a.acquire('k', lease=0.2))
+
+
+def test_get_or_load_waits_out_a_dead_lease(path):
+    a, b = s.SQLiteCache(path), s.SQLiteCache(path)
+    assert in_thread(lambda: a.acquire('k', lease=0.3))
+    start = time.monotonic()
+    value, _, _ = b.get_or_load('k', lambda: 'v', 60, wait=5)
+    assert value == 'v' and 0.25 < time.monotonic() - start < 5
+    assert b.misses == 1 and b.waits > 0
+
+
+def test_stale_row_while_another_worker_holds_the_lease(path):
+    a, b = s.SQLiteCache(path), s.SQLiteCache(path)
+    now = time.time()
+    a.set('k', 'old', now - 5, now + 60)        # 만료됐지만 stale 로는 쓸 수 있는 값
+    assert in_thread(lambda: a.acquire('k', lease=60))
+    calls = []
+    value, expires, stored = b.get_or_load('k', lambda: calls.append(1) or 'new', 60, stale_ttl=60)
+    assert (value, calls, b.stale) == ('old', [], 1)
+    assert expires < time.time()
+
+
+def test_waiting_worker_gets_the_loaders_value(path):
+    a, b = s.SQLiteCache(path), s.SQLiteCache(path)
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.3)
+        calls.append('a')
+        return 'from a'
+
+    worker = threading.Thread(target=lambda: a.get_or_load('k', slow, 60))
+    worker.start()
+    started.wait()
+    value, _, _ = b.get_or_load('k', lambda: calls.append('b') or 'from b', 60, wait=5)
+    worker.join()
+    assert value == 'from a' and calls == ['a'] and b.waits > 0
+
+
+def test_ttl_caches_share_one_load(path):
+    calls = []
+    loader = lambda: calls.append(1) or 'v'
+    first = s.TTLCache(8, 0, None, s.SQLiteCache(path), 'history')
+    second = s.TTLCache(8, 0, None, s.SQLiteCache(path), 'history')
+    assert first.get_or_load(('AAA', '1y'), loader, 60) == 'v'
+    assert second.get_or_load(('AAA', '1y'), loader, 60) == 'v'
+    assert len(calls) == 1
@@ -0,0 +1,29 @@
+"""/analyze·/scan·/portfolio 가 같은 종목에 같은 매수·매도 점수를 내는지."""
+
+import pytest
+
+import stockscan as s
+
+TICKERS = ['AAPL', 'MSFT', '005930.KS', 'T046']   # T046: 60봉 스냅숏으로는 점수가 달라지던 픽스처
+
+
+@pytest.fixture(scope='module')
+def analyzed():
+    client = s.app.test_client()
+    out = {}
+    for t in TICKERS:
+        body = client.get(f'/analyze?ticker={t}').get_json()
+        out[t] = body['buy_score'] - body['sell_score']
+    return out
+
+
+def test_scan_matches_analyze(analyzed):
+    body = s.app.test_client().get('/scan?tickers=' + ','.join(TICKERS)).get_json()
+    assert {r['ticker']: r['score'] for r in body['results']} == analyzed
+
+
+@pytest.mark.parametrize('period', ['1y', '3mo', '6mo'])
+def test_portfolio_matches_analyze(analyzed, period):
+    body = s.app.test_client().get(f'/portfolio?tickers={",".join(TICKERS)}&period={period}').get_json()
+    assert 'error' not in body
+    assert {h['ticker']: h['score'] for h in body['holdings']} == analyzed
@@ -0,0 +1,45 @@
+"""PriceStore 와 fetch_history 가 저장소를 upstream 과 같게 유지하는지."""
+
+import numpy as np
+import pytest
+
+import stockscan as s
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    fixture = s.FixtureProvider(bars=600)
+    monkeypatch.setattr(s, 'STORE_ENABLED', True)
+    monkeypatch.setattr(s, 'price_store', s.PriceStore(str(tmp_path)))
+    monkeypatch.setattr(s, 'provider', fixture)
+    return fixture
+
+
+def stored(ticker):
+    bars, tz = s.price_store.load(ticker)
+    return s.price_store.frame(bars, tz)
+
+
+def test_append_keeps_stored_bars(store):
+    s.fetch_history('AAA', '2y')
+    before = stored('AAA')
+    hist = s.fetch_history('AAA', '6mo')
+    after = stored('AAA')
+    assert after.index.equals(before.index)
+    np.testing.assert_array_equal(after['Close'], before['Close'])
+    assert hist.index[-1] == after.index[-1]
+
+
+def test_adjustment_rewrites_older_bars(store):
+    s.fetch_history('AAA', '2y')
+    # 마지막 봉이 배당락일이면 upstream 은 그 앞의 모든 봉을 같은 비율로 낮춘다
+    upstream = store._load_history('AAA')
+    upstream.iloc[:-1, :4] *= 0.97
+    hist = s.fetch_history('AAA', '6mo')
+    after = stored('AAA')
+    # 요청한 6mo 보다 앞서 저장된 봉까지 수정주가로 바뀌어야 한다
+    expected = upstream[upstream.index >= after.index[0]]
+    assert after.index.equals(expected.index)
+    np.testing.assert_allclose(after['Close'], expected['Close'])
+    np.testing.assert_allclose(hist['Close'], upstream['Close'].loc[hist.index])
+    assert np.abs(np.diff(np.log(after['Close'].to_numpy()))).max() < 0.2